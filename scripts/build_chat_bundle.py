@@ -18,16 +18,20 @@ Design principles:
 
 from __future__ import annotations
 
-import json
+import heapq
+import io
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 from zoneinfo import ZoneInfo
 
 from iron_common import (
-    read_json, write_json, write_text, sha256_file, sha256_bytes,
-    json_pointer_get, coerce_number
+    read_json_sha256, json_bytes, write_bytes, sha256_bytes, bundle_sha256,
+    json_pointer_getter
 )
 
 # We publish only to /docs (GitHub Pages). Root duplicates were removed on purpose.
@@ -63,17 +67,33 @@ HANDSHAKE_LINKS = [
     "https://data-api.binance.vision/api/v3/klines?symbol=ETHUSDT&interval=4h&limit=2",
     "https://data-api.binance.vision/api/v3/klines?symbol=ETHUSDT&interval=1h&limit=2",
     "https://data-api.binance.vision/api/v3/klines?symbol=ETHUSDT&interval=15m&limit=20",
-    # deriv (live, pull directly from Binance)
-    "https://fapi.binance.com/fapi/v1/premiumIndex?symbol=BTCUSDT",
-    "https://fapi.binance.com/fapi/v1/openInterest?symbol=BTCUSDT",
-    "https://fapi.binance.com/futures/data/openInterestHist?symbol=BTCUSDT&period=1h&limit=30",
-    "https://fapi.binance.com/fapi/v1/fundingRate?symbol=BTCUSDT&limit=30",
-    "https://fapi.binance.com/fapi/v1/premiumIndex?symbol=ETHUSDT",
-    "https://fapi.binance.com/fapi/v1/openInterest?symbol=ETHUSDT",
-    "https://fapi.binance.com/futures/data/openInterestHist?symbol=ETHUSDT&period=1h&limit=30",
-    "https://fapi.binance.com/fapi/v1/fundingRate?symbol=ETHUSDT&limit=30",
 ]
 
+# Live Binance FAPI derivative endpoints, one set per symbol: (report label, url template).
+DERIV_LINK_TEMPLATES = [
+    ("premiumIndex", "https://fapi.binance.com/fapi/v1/premiumIndex?symbol={s}"),
+    ("openInterest", "https://fapi.binance.com/fapi/v1/openInterest?symbol={s}"),
+    ("openInterestHist(1h×30)", "https://fapi.binance.com/futures/data/openInterestHist?symbol={s}&period=1h&limit=30"),
+    ("fundingRate(×30)", "https://fapi.binance.com/fapi/v1/fundingRate?symbol={s}&limit=30"),
+]
+DERIV_SYMBOLS = ("BTCUSDT", "ETHUSDT")
+
+# deriv (live, pull directly from Binance)
+HANDSHAKE_LINKS += [url.format(s=sym) for sym in DERIV_SYMBOLS for _, url in DERIV_LINK_TEMPLATES]
+
+# Report "Ссылки (рукопожатие)" block, rendered once.
+HANDSHAKE_BLOCK = "".join(f"{u}\n" for u in HANDSHAKE_LINKS)
+
+# Report "Деривативы" block per symbol, rendered once.
+DERIV_REPORT_LINES = {
+    sym: "".join(f"- {label}: {url.format(s=sym)}\n" for label, url in DERIV_LINK_TEMPLATES)
+    for sym in DERIV_SYMBOLS
+}
+
+
+# Report header shows local (Tallinn) time; one tz lookup per process.
+REPORT_TZ = ZoneInfo("Europe/Tallinn")
+
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc).replace(microsecond=0)
@@ -86,6 +106,22 @@ def iso_z(dt: datetime) -> str:
 def parse_iso_z(s: str) -> Optional[datetime]:
     if not isinstance(s, str) or not s:
         return None
+    return _parse_iso_z_str(s)
+
+
+# Levels of one symbol share candle timestamps; datetimes are immutable, so caching is safe.
+@lru_cache(maxsize=2048)
+def _parse_iso_z_str(s: str) -> Optional[datetime]:
+    # Fast path: canonical "YYYY-MM-DDTHH:MM:SSZ" written by build_ta_state.py
+    if len(s) == 20 and s[19] == "Z" and s[4] == "-" and s[7] == "-" and s[10] == "T" and s[13] == ":" and s[16] == ":":
+        try:
+            return datetime(
+                int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                int(s[11:13]), int(s[14:16]), int(s[17:19]),
+                tzinfo=timezone.utc,
+            )
+        except ValueError:
+            pass
     try:
         return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
     except Exception:
@@ -93,19 +129,37 @@ def parse_iso_z(s: str) -> Optional[datetime]:
 
 
 def days_since(ts_utc: Optional[str], now_utc: datetime) -> Optional[float]:
-    dt = parse_iso_z(ts_utc) if ts_utc else None
+    if not isinstance(ts_utc, str) or not ts_utc:
+        return None
+    return _days_since_str(ts_utc, now_utc)
+
+
+# now_utc is whole seconds (utc_now), so (ts, now) repeats within one build.
+@lru_cache(maxsize=2048)
+def _days_since_str(ts_utc: str, now_utc: datetime) -> Optional[float]:
+    dt = parse_iso_z(ts_utc)
     if dt is None:
         return None
     return round((now_utc - dt).total_seconds() / 86400.0, 3)
 
 
+_THOUSANDS_TRANS = str.maketrans(",", " ")  # space thousands
+
+
+# Report numbers repeat (core/buffer bounds shared by neighbours, facts).
+@lru_cache(maxsize=1024)
+def _fmt_num2(v: float) -> str:
+    return format(v, ",.2f").translate(_THOUSANDS_TRANS)
+
+
 def fmt_num(x: Any, digits: int = 2) -> str:
     try:
         v = float(x)
     except Exception:
         return str(x)
-    s = f"{v:,.{digits}f}"
-    return s.replace(",", " ")  # space thousands
+    if digits == 2 and v:  # not 0.0: it shares a cache slot with -0.0
+        return _fmt_num2(v)
+    return format(v, f",.{digits}f").translate(_THOUSANDS_TRANS)
 
 
 def fmt_range(rng: Any, digits: int = 2) -> str:
@@ -114,26 +168,43 @@ def fmt_range(rng: Any, digits: int = 2) -> str:
     return f"[{fmt_num(rng[0], digits)} – {fmt_num(rng[1], digits)}]"
 
 
-def overlap(a: Tuple[float, float], b: Tuple[float, float]) -> bool:
-    return max(a[0], b[0]) <= min(a[1], b[1])
+class IntervalIndex:
+    """Sorted index of closed intervals [lo, hi] for overlap queries.
+
+    Backed by parallel arrays sorted by `lo`; a query bisects `lows` and only
+    scans entries whose low end lies within the widest stored interval, so it
+    costs O(log n + m) instead of a full scan. Bulk-load first, then query.
+    """
+
+    def __init__(self, items: Optional[List[Tuple[float, float, int]]] = None) -> None:
+        rows = sorted(items or [])
+        self.lows: List[float] = [r[0] for r in rows]
+        self.highs: List[float] = [r[1] for r in rows]
+        self.ids: List[int] = [r[2] for r in rows]
+        self._max_w = max((r[1] - r[0] for r in rows), default=0.0)
+
+    def __len__(self) -> int:
+        return len(self.lows)
 
+    def add(self, lo: float, hi: float, ident: int = -1) -> None:
+        i = bisect_right(self.lows, lo)
+        self.lows.insert(i, lo)
+        self.highs.insert(i, hi)
+        self.ids.insert(i, ident)
+        self._max_w = max(self._max_w, hi - lo)
 
-def union(a: Tuple[float, float], b: Tuple[float, float]) -> Tuple[float, float]:
-    return (min(a[0], b[0]), max(a[1], b[1]))
+    def _span(self, lo: float, hi: float) -> range:
+        return range(bisect_left(self.lows, lo - self._max_w), bisect_right(self.lows, hi))
 
+    def any_overlap(self, lo: float, hi: float) -> bool:
+        highs = self.highs
+        return any(highs[i] >= lo for i in self._span(lo, hi))
+
+    def overlapping(self, lo: float, hi: float) -> List[int]:
+        """Ids of stored intervals intersecting [lo, hi], in ascending id order."""
+        highs, ids = self.highs, self.ids
+        return sorted(ids[i] for i in self._span(lo, hi) if highs[i] >= lo)
 
-def clamp_range(r: Tuple[float, float], lo: Optional[float], hi: Optional[float]) -> Tuple[float, float]:
-    a, b = r
-    if lo is not None:
-        a = max(a, lo)
-        b = max(b, lo)
-    if hi is not None:
-        a = min(a, hi)
-        b = min(b, hi)
-    if a > b:
-        m = (a + b) / 2.0
-        return (m, m)
-    return (a, b)
 
 def assert_levels_ok(
     sym: str,
@@ -155,13 +226,31 @@ def assert_levels_ok(
     def _ov(a: Tuple[float, float], b: Tuple[float, float]) -> bool:
         return max(a[0], b[0]) <= min(a[1], b[1]) + eps
 
+    def _overlap_pairs(ranges: List[Tuple[float, float]]) -> set:
+        # Sweep by low end: a range leaves the active set once nothing starting
+        # at or after the current low can overlap it. Returns (i, j), i < j.
+        pairs = set()
+        active: List[int] = []
+        for k in sorted(range(len(ranges)), key=ranges.__getitem__):
+            lo = ranges[k][0]
+            active = [j for j in active if ranges[j][1] + eps >= lo]
+            for j in active:
+                if _ov(ranges[j], ranges[k]):
+                    pairs.add((min(j, k), max(j, k)))
+            active.append(k)
+        return pairs
+
     def _check(items: List[Dict[str, Any]], side: str) -> None:
         # range integrity + side correctness
+        cores: List[Tuple[float, float]] = []
+        bufs: List[Tuple[float, float]] = []
         for it in items:
             if "core" not in it or "buffer" not in it:
                 raise SystemExit(f"{sym}: missing core/buffer in level item: {it}")
             core = _norm(it["core"])
             buf = _norm(it["buffer"])
+            cores.append(core)
+            bufs.append(buf)
 
             if not (buf[0] - eps <= core[0] <= core[1] <= buf[1] + eps):
                 raise SystemExit(f"{sym}: core must be inside buffer (side={side}) core={core} buf={buf}")
@@ -174,25 +263,23 @@ def assert_levels_ok(
                 if core[0] < price - eps:
                     raise SystemExit(f"{sym}: resistance core below price: core={core} price={price}")
 
-        # ordering
-        if side == "S":
-            if items != sorted(items, key=lambda x: float(_norm(x["core"])[1]), reverse=True):
-                raise SystemExit(f"{sym}: supports not sorted (closest first)")
-        else:
-            if items != sorted(items, key=lambda x: float(_norm(x["core"])[0])):
-                raise SystemExit(f"{sym}: resistances not sorted (closest first)")
+        # ordering (closest first; equal keys allowed): one linear scan
+        for i in range(len(cores) - 1):
+            if side == "S":
+                if cores[i][1] < cores[i + 1][1]:
+                    raise SystemExit(f"{sym}: supports not sorted (closest first)")
+            else:
+                if cores[i][0] > cores[i + 1][0]:
+                    raise SystemExit(f"{sym}: resistances not sorted (closest first)")
 
         # non-overlap (core + buffer)
-        for i in range(len(items)):
-            for j in range(i + 1, len(items)):
-                ci = _norm(items[i]["core"])
-                cj = _norm(items[j]["core"])
-                if _ov(ci, cj):
-                    raise SystemExit(f"{sym}: overlapping CORES {items[i].get('name')} {ci} vs {items[j].get('name')} {cj}")
-                bi = _norm(items[i]["buffer"])
-                bj = _norm(items[j]["buffer"])
-                if _ov(bi, bj):
-                    raise SystemExit(f"{sym}: overlapping BUFFERS {items[i].get('name')} {bi} vs {items[j].get('name')} {bj}")
+        # first (i, j) in pair order, CORES before BUFFERS for the same pair
+        core_pairs = _overlap_pairs(cores)
+        pairs = core_pairs | _overlap_pairs(bufs)
+        if pairs:
+            i, j = min(pairs)
+            what, ranges = ("CORES", cores) if (i, j) in core_pairs else ("BUFFERS", bufs)
+            raise SystemExit(f"{sym}: overlapping {what} {items[i].get('name')} {ranges[i]} vs {items[j].get('name')} {ranges[j]}")
 
     _check(supports, "S")
     _check(resistances, "R")
@@ -218,13 +305,17 @@ def behavior_tag(tests: int, rr: Optional[float], fr: Optional[float]) -> str:
     return "mixed"
 
 
-def extract_facts(contract: Dict[str, Any], state: Any, deriv: Any) -> List[Dict[str, Any]]:
+def extract_facts(contract: Dict[str, Any], state: Any, deriv: Any) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Resolve contract facts; returns (facts list, facts_index {id: value}) in one pass."""
     facts: List[Dict[str, Any]] = []
+    fx: Dict[str, Any] = {}
+    # facts share long prefixes (/symbols/BTCUSDT/...): resolve each parent once
+    get_state = json_pointer_getter(state)
+    get_deriv = json_pointer_getter(deriv)
     for f in contract.get("facts", []):
         src = f["source"]
         ptr = f["pointer"]
-        doc = state if src == "state" else deriv
-        val = json_pointer_get(doc, ptr)
+        val = (get_state if src == "state" else get_deriv)(ptr)
         facts.append({
             "id": f["id"],
             "source": src,
@@ -232,11 +323,8 @@ def extract_facts(contract: Dict[str, Any], state: Any, deriv: Any) -> List[Dict
             "type": f.get("type", "any"),
             "value": val,
         })
-    return facts
-
-
-def facts_index(facts: List[Dict[str, Any]]) -> Dict[str, Any]:
-    return {f["id"]: f["value"] for f in facts}
+        fx[f["id"]] = val
+    return facts, fx
 
 
 
@@ -269,93 +357,113 @@ def _macro_quality_from_reaction(q: Any) -> Optional[Dict[str, Any]]:
     }
 
 
-def _pick_local_levels(
-    local_list: List[Dict[str, Any]],
-    price: float,
-    side: str,
-    atr_h4: float,
-    n: int = 4,
-) -> List[Dict[str, Any]]:
-    """Pick up to n disjoint local H4 zones closest to price on the correct side."""
-    out: List[Dict[str, Any]] = []
+class LocalZone(NamedTuple):
+    """Local/structural candidate zone, validated and normalized once (lo <= hi)."""
+    lo: float
+    hi: float
+    score: float
+    strength: float
+    raw: Dict[str, Any]
 
-    # Gap to avoid overlaps between chosen levels
-    gap = max(price * 0.00035, atr_h4 * 0.03)
 
-    # Distance to price from a zone for the given side
-    cands: List[Tuple[float, float, Dict[str, Any]]] = []
-    for it in local_list or []:
+def _local_zones(items: List[Dict[str, Any]]) -> List[LocalZone]:
+    """Normalize local H4 zones; items without a [lo, hi] zone are dropped."""
+    out: List[LocalZone] = []
+    for it in items or []:
         z = it.get("zone")
         if not isinstance(z, list) or len(z) != 2:
             continue
         lo, hi = float(z[0]), float(z[1])
         if lo > hi:
             lo, hi = hi, lo
+        out.append(LocalZone(lo, hi, float(it.get("score") or 0.0), float(it.get("strength") or 0.0), it))
+    return out
 
-        # keep only relevant side (support below / resistance above),
-        # but allow "price inside" (distance=0) as S1/R1 in chop.
-        if side == "S":
-            if lo <= price <= hi:
-                dist = 0.0
-            elif hi < price:
-                dist = price - hi
-            else:
-                continue
-        else:
-            if lo <= price <= hi:
-                dist = 0.0
-            elif lo > price:
-                dist = lo - price
-            else:
-                continue
 
-        score = float(it.get("score") or 0.0)
-        strength = float(it.get("strength") or 0.0)
-        # prefer closer; then better score/strength
-        cands.append((dist, -(score + 10.0 * strength), it))
+def _struct_zones(items: List[Dict[str, Any]]) -> List[LocalZone]:
+    """Normalize structural zones; score is made comparable with local candidates."""
+    out: List[LocalZone] = []
+    for it in items or []:
+        z = it.get("zone")
+        if isinstance(z, list) and len(z) == 2:
+            lo = float(min(z[0], z[1]))
+            hi = float(max(z[0], z[1]))
+            out.append(LocalZone(lo, hi, float(it.get("touches") or 0) * 10.0, float(it.get("strength") or 0), it))
+    return out
 
-    cands.sort(key=lambda x: (x[0], x[1]))
 
-    def _overlaps_any(z: Tuple[float, float]) -> bool:
-        for sel in out:
-            zl = sel["_core"]
-            if overlap(z, zl):
-                return True
-            # also avoid too tight adjacency
-            if z[0] <= zl[1] + gap and z[1] >= zl[0] - gap:
-                return True
-        return False
+def _pick_local_levels(
+    zones: List[LocalZone],
+    price: float,
+    side: str,
+    atr_h4: float,
+    n: int = 4,
+) -> List[Tuple[LocalZone, float]]:
+    """Pick up to n disjoint local H4 zones closest to price on the correct side.
 
-    for dist, _, it in cands:
-        z = it.get("zone")
-        lo, hi = float(z[0]), float(z[1])
-        if lo > hi:
-            lo, hi = hi, lo
-        zr = (lo, hi)
-        if _overlaps_any(zr):
+    Returns (zone, distance_to_price) pairs; the zone dicts are not copied.
+    """
+    out: List[Tuple[LocalZone, float]] = []
+
+    # Gap to avoid overlaps between chosen levels
+    gap = max(price * 0.00035, atr_h4 * 0.03)
+
+    # Distance to price from a zone for the given side.
+    # Keep only relevant side (support below / resistance above),
+    # but allow "price inside" (distance=0) as S1/R1 in chop.
+    # Prefer closer; then better score/strength
+    # (input index breaks ties, same order as a stable sort).
+    # One comprehension per side keeps the side test out of the per-zone loop.
+    cands: List[Tuple[float, float, int, LocalZone]]
+    if side == "S":
+        cands = [
+            (price - zn.hi if zn.hi < price else 0.0, -(zn.score + 10.0 * zn.strength), i, zn)
+            for i, zn in enumerate(zones)
+            if zn.lo <= price
+        ]
+    else:
+        cands = [
+            (zn.lo - price if zn.lo > price else 0.0, -(zn.score + 10.0 * zn.strength), i, zn)
+            for i, zn in enumerate(zones)
+            if zn.hi >= price
+        ]
+
+    # Only the first few candidates that survive the overlap check are needed,
+    # so pop them off a heap instead of sorting the whole list.
+    heapq.heapify(cands)
+
+    # Selected cores expanded by `gap`: a candidate is rejected if it overlaps
+    # or sits too tight to any of them.
+    taken = IntervalIndex()
+
+    while cands:
+        dist, _, _, zn = heapq.heappop(cands)
+        lo, hi = zn.lo, zn.hi
+        if taken.any_overlap(lo, hi):
             continue
-        it2 = dict(it)
-        it2["_dist"] = float(dist)
-        it2["_core"] = zr
-        out.append(it2)
+        taken.add(lo - gap, hi + gap)
+        out.append((zn, float(dist)))
         if len(out) >= n:
             break
 
     # sort for stable naming: supports top-down, resistances bottom-up
     if side == "S":
-        out.sort(key=lambda it: it["_core"][1], reverse=True)
+        out.sort(key=lambda p: p[0].hi, reverse=True)
     else:
-        out.sort(key=lambda it: it["_core"][0])
+        out.sort(key=lambda p: p[0].lo)
     return out
 
 
-def _macro_context(sym_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _macro_context(
+    rw1: Dict[str, Any],
+    sd1: Dict[str, Any],
+    structural: Dict[str, Any],
+) -> List[Dict[str, Any]]:
     """Collect macro bands/zones as context for buffer/behavior."""
     out: List[Dict[str, Any]] = []
-    zones = (sym_state or {}).get("zones", {}) or {}
-
+    if not rw1 and not sd1 and not structural.get("supports") and not structural.get("resistances"):
+        return out  # degraded state (new listing/outage): nothing to walk
     # Range W1 discount/premium bands with reaction stats
-    rw1 = zones.get("range_w1") or {}
     for key, side in (("discount", "S"), ("premium", "R")):
         band = (rw1.get("bands") or {}).get(key)
         if isinstance(band, list) and len(band) == 2:
@@ -369,7 +477,6 @@ def _macro_context(sym_state: Dict[str, Any]) -> List[Dict[str, Any]]:
             })
 
     # Swing D1 entry bands with reaction stats
-    sd1 = zones.get("swing_d1") or {}
     for key, side in (("support_entry", "S"), ("resistance_entry", "R")):
         band = (sd1.get("bands") or {}).get(key)
         if isinstance(band, list) and len(band) == 2:
@@ -383,7 +490,6 @@ def _macro_context(sym_state: Dict[str, Any]) -> List[Dict[str, Any]]:
             })
 
     # Structural zones list (wide) — buffer only
-    structural = (zones.get("structural") or {})
     for side_key, side in (("supports", "S"), ("resistances", "R")):
         for i, it in enumerate(structural.get(side_key) or []):
             z = it.get("zone")
@@ -408,12 +514,10 @@ def _macro_context(sym_state: Dict[str, Any]) -> List[Dict[str, Any]]:
     return out
 
 
-def _range_w1_view(sym_state: Dict[str, Any], price: float) -> Dict[str, Any]:
+def _range_w1_view(rw1: Dict[str, Any], price: float) -> Dict[str, Any]:
     """Range context for UI: discount / middle / premium.
     Uses zones.range_w1.bands.{discount,premium} if present.
     """
-    zones = (sym_state or {}).get("zones", {}) or {}
-    rw1 = zones.get("range_w1") or {}
     bands = (rw1.get("bands") or {})
     disc = bands.get("discount")
     prem = bands.get("premium")
@@ -439,37 +543,31 @@ def _range_w1_view(sym_state: Dict[str, Any], price: float) -> Dict[str, Any]:
     return out
 
 
-def _expand_buffer(
-    core: Tuple[float, float],
+MacroBand = Tuple[float, float, str, Optional[Dict[str, Any]]]  # (lo, hi, id, quality)
+
+
+def _index_macro_side(
     macro: List[Dict[str, Any]],
     side: str,
-    atr_h4: float,
-) -> Tuple[Tuple[float, float], List[str], Optional[Dict[str, Any]]]:
+) -> Tuple[List[MacroBand], IntervalIndex, Optional[Dict[str, Any]]]:
     """
-    Expand buffer around a local core by merging overlapping/near macro bands,
-    but do NOT let macro swallow other neighbour levels (cap later).
-    Returns: (buffer, sources_used, best_macro_quality)
+    Partition macro bands for one side once per symbol (pre-extracted tuples,
+    no per-core dict lookups).
+    Returns: (bands, interval index over bands, best macro quality on this side)
     """
-    buf = core
-    used: List[str] = []
+    bands: List[MacroBand] = []
     best_q: Optional[Dict[str, Any]] = None
     best_q_score = -1.0
 
-    near_tol = max(atr_h4 * 0.10, (core[1] - core[0]) * 0.50)
-
     for m in macro:
         if m.get("side") != side:
             continue
         mr = m.get("range")
         if not isinstance(mr, tuple) or len(mr) != 2:
             continue
-        r = (float(mr[0]), float(mr[1]))
-        # overlap OR close enough
-        if overlap(buf, r) or abs(r[0] - buf[1]) <= near_tol or abs(buf[0] - r[1]) <= near_tol:
-            buf = union(buf, r)
-            used.append(m.get("id", "macro"))
-
         q = m.get("quality")
+        bands.append((float(mr[0]), float(mr[1]), m.get("id", "macro"), q))
+
         if isinstance(q, dict):
             tests = float(q.get("tests") or 0.0)
             rr = q.get("reaction_rate")
@@ -481,9 +579,87 @@ def _expand_buffer(
                 best_q_score = score
                 best_q = q
 
+    # indexed by normalized bounds so a reversed band is still a candidate
+    index = IntervalIndex([(min(lo, hi), max(lo, hi), i) for i, (lo, hi, _, _) in enumerate(bands)])
+    return bands, index, best_q
+
+
+def _expand_buffer(
+    core: Tuple[float, float],
+    macro_side: Tuple[List[MacroBand], IntervalIndex, Optional[Dict[str, Any]]],
+    atr_h4: float,
+) -> Tuple[Tuple[float, float], List[str], Optional[Dict[str, Any]]]:
+    """
+    Expand buffer around a local core by merging overlapping/near macro bands,
+    but do NOT let macro swallow other neighbour levels (cap later).
+    Bands are merged in their original order, a later band may match only
+    after the buffer has grown (single pass, same as a linear scan).
+    Returns: (buffer, sources_used, best_macro_quality)
+    """
+    bands, index, best_q = macro_side
+    if not bands:
+        return core, [], best_q
+    buf = core
+    used: List[str] = []
+
+    near_tol = max(atr_h4 * 0.10, (core[1] - core[0]) * 0.50)
+
+    # The index narrows the scan to bands intersecting buf widened by near_tol
+    # (plus float slack); the exact overlap-OR-close-enough test decides.
+    pos = -1
+    while True:
+        b0, b1 = buf
+        slack = near_tol + 1e-9 * (abs(b0) + abs(b1) + 1.0)
+        for i in index.overlapping(b0 - slack, b1 + slack):
+            if i <= pos:
+                continue
+            lo, hi = bands[i][0], bands[i][1]
+            if max(b0, lo) <= min(b1, hi) or abs(lo - b1) <= near_tol or abs(b0 - hi) <= near_tol:
+                break
+        else:
+            break
+        pos = i
+        buf = (min(b0, lo), max(b1, hi))
+        used.append(bands[i][2])
+
     return buf, used, best_q
 
 
+@dataclass(slots=True)
+class Level:
+    """One 4S/4R level while it is assembled/capped; to_json() at the bundle boundary."""
+    name: str
+    role: str
+    behavior: str
+    tf_core: str
+    core: Tuple[float, float]
+    buffer: Tuple[float, float]
+    strength_level: int
+    strength_emoji: str
+    quality_local: Dict[str, Any]
+    quality_macro_best: Optional[Dict[str, Any]]
+    distance_to_price: float
+    sources: List[str]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "role": self.role,
+            "behavior": self.behavior,         # bounce / magnet / mixed / unknown
+            "tf_core": self.tf_core,
+            "core": list(self.core),
+            "buffer": list(self.buffer),
+            "strength": {
+                "level": self.strength_level,
+                "emoji": self.strength_emoji,
+            },
+            "quality_local": self.quality_local,
+            "quality_macro_best": self.quality_macro_best,
+            "distance_to_price": self.distance_to_price,
+            "sources": self.sources,
+        }
+
+
 def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> Dict[str, Any]:
     """
     Deterministic 4 supports + 4 resistances:
@@ -498,52 +674,39 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
     price = float(data.get("price") or 0.0)
     atr_h4 = float(((vol.get("atr14") or {}).get("H4")) or 0.0)
 
+    # zone groups are looked up once here and handed to the helpers
     local = (zones.get("local_h4") or {})
-    local_raw_s = list(local.get("supports") or [])
-    local_raw_r = list(local.get("resistances") or [])
-
     structural = (zones.get("structural") or {})
+    rw1 = zones.get("range_w1") or {}
+    sd1 = zones.get("swing_d1") or {}
 
-    def _struct_to_local(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        out: List[Dict[str, Any]] = []
-        for it in items or []:
-            z = it.get("zone")
-            if isinstance(z, list) and len(z) == 2:
-                lo = float(min(z[0], z[1]))
-                hi = float(max(z[0], z[1]))
-                it2 = dict(it)
-                it2["zone"] = [lo, hi]
-                # make it comparable with local candidates
-                it2["score"] = float(it.get("touches") or 0) * 10.0
-                it2["strength"] = float(it.get("strength") or 0)
-                out.append(it2)
-        return out
+    local_raw_s = _local_zones(local.get("supports") or [])
+    local_raw_r = _local_zones(local.get("resistances") or [])
 
     # Combine local + structural, then pick 4 disjoint levels (core ranges) deterministically.
-    local_s = _pick_local_levels(local_raw_s + _struct_to_local(structural.get("supports") or []), price, "S", atr_h4, 4)
-    local_r = _pick_local_levels(local_raw_r + _struct_to_local(structural.get("resistances") or []), price, "R", atr_h4, 4)
-    macro = _macro_context(sym_state)
-    range_w1 = _range_w1_view(sym_state, price)
-
-    def _mk_items(items: List[Dict[str, Any]], side: str) -> List[Dict[str, Any]]:
-        out: List[Dict[str, Any]] = []
-        for i, it in enumerate(items[:4], start=1):
-            core = it.get("_core")
-            if not isinstance(core, tuple) or len(core) != 2:
-                z = it.get("zone")
-                core = (float(z[0]), float(z[1])) if isinstance(z, list) and len(z) == 2 else (0.0, 0.0)
-            core = (float(core[0]), float(core[1]))
-            if core[0] > core[1]:
-                core = (core[1], core[0])
-
-            q_local = _local_quality(it, now_utc)
+    local_s = _pick_local_levels(local_raw_s + _struct_zones(structural.get("supports") or []), price, "S", atr_h4, 4)
+    local_r = _pick_local_levels(local_raw_r + _struct_zones(structural.get("resistances") or []), price, "R", atr_h4, 4)
+    if SIMPLE_LEVELS:
+        macro_by_side = {}  # buffer == core: macro bands are not consulted
+    else:
+        macro = _macro_context(rw1, sd1, structural)
+        # per-side partition (S/R) is built once here, not per core
+        macro_by_side = {side: _index_macro_side(macro, side) for side in ("S", "R")}
+    range_w1 = _range_w1_view(rw1, price)
+
+    def _mk_items(items: List[Tuple[LocalZone, float]], side: str) -> List[Level]:
+        out: List[Level] = []
+        for i, (zn, dist) in enumerate(items[:4], start=1):
+            core = (zn.lo, zn.hi)
+
+            q_local = _local_quality(zn.raw, now_utc)
             if SIMPLE_LEVELS:
 
                 buf, used, q_macro_best = core, [], None
 
             else:
 
-                buf, used, q_macro_best = _expand_buffer(core, macro, side, atr_h4)
+                buf, used, q_macro_best = _expand_buffer(core, macro_by_side[side], atr_h4)
 
             # choose quality for emoji/behavior: prefer macro reaction stats if present, else local
             q_for_rate = q_macro_best if isinstance(q_macro_best, dict) else q_local
@@ -555,7 +718,7 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
             emoji = strength_emoji_from_rates(tests, rr, fr)
 
             # base strength: local 1..5 if present; boost if macro says 🟢
-            base_strength = int(it.get("strength") or 0)
+            base_strength = int(zn.strength)
             if emoji == "🟢":
                 strength_level = min(5, max(base_strength, 4))
             elif emoji == "🟡":
@@ -565,7 +728,6 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
             else:
                 strength_level = max(1, base_strength) if base_strength else 1
 
-            dist = float(it.get("_dist") or 0.0)
             # role label by index (practical): closer = oper, mid = struct, far = macro
             if i <= 2:
                 role = "oper"
@@ -574,71 +736,68 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
             else:
                 role = "macro"
 
-            out.append({
-                "name": f"{'S' if side=='S' else 'R'}{i}",
-                "role": role,
-                "behavior": beh,         # bounce / magnet / mixed / unknown
-                "tf_core": it.get("tf", "H4"),
-                "core": [round(core[0], 2), round(core[1], 2)],
-                "buffer": [round(buf[0], 2), round(buf[1], 2)],
-                "strength": {
-                    "level": int(strength_level),
-                    "emoji": emoji,
-                },
-                "quality_local": q_local,
-                "quality_macro_best": q_macro_best,
-                "distance_to_price": round(dist, 2),
-                "sources": ["local_h4"] + used,
-            })
+            out.append(Level(
+                name=f"{'S' if side=='S' else 'R'}{i}",
+                role=role,
+                behavior=beh,
+                tf_core=zn.raw.get("tf", "H4"),
+                core=(round(core[0], 2), round(core[1], 2)),
+                buffer=(round(buf[0], 2), round(buf[1], 2)),
+                strength_level=int(strength_level),
+                strength_emoji=emoji,
+                quality_local=q_local,
+                quality_macro_best=q_macro_best,
+                distance_to_price=round(dist, 2),
+                sources=["local_h4"] + used,
+            ))
         return out
 
     supports = _mk_items(local_s, "S")
     resistances = _mk_items(local_r, "R")
 
     # Cap buffers to avoid overlaps between adjacent levels
-    def _cap(side_items: List[Dict[str, Any]], side: str) -> None:
+    def _cap(side_items: List[Level], side: str) -> None:
         # sort by core position
         if side == "S":
-            side_items.sort(key=lambda x: x["core"][1], reverse=True)
+            side_items.sort(key=lambda x: x.core[1], reverse=True)
         else:
-            side_items.sort(key=lambda x: x["core"][0])
+            side_items.sort(key=lambda x: x.core[0])
 
         # separators between neighbours using cores (not buffers)
         for i in range(len(side_items) - 1):
             a = side_items[i]
             b = side_items[i + 1]
+            # buffers are ordered (lo <= hi), so clamping to one side of
+            # `sep` is a plain max/min
+            a_lo, a_hi = a.buffer
+            b_lo, b_hi = b.buffer
             if side == "S":
-                sep = (a["core"][0] + b["core"][1]) / 2.0
-                a_buf = (a["buffer"][0], a["buffer"][1])
-                b_buf = (b["buffer"][0], b["buffer"][1])
-                a_buf = clamp_range(a_buf, sep, None)  # a lower bound >= sep
-                b_buf = clamp_range(b_buf, None, sep)  # b upper bound <= sep
-                a["buffer"] = [round(a_buf[0], 2), round(a_buf[1], 2)]
-                b["buffer"] = [round(b_buf[0], 2), round(b_buf[1], 2)]
+                sep = (a.core[0] + b.core[1]) / 2.0
+                a.buffer = (round(max(a_lo, sep), 2), round(max(a_hi, sep), 2))  # a lower bound >= sep
+                b.buffer = (round(min(b_lo, sep), 2), round(min(b_hi, sep), 2))  # b upper bound <= sep
             else:
-                sep = (a["core"][1] + b["core"][0]) / 2.0
-                a_buf = (a["buffer"][0], a["buffer"][1])
-                b_buf = (b["buffer"][0], b["buffer"][1])
-                a_buf = clamp_range(a_buf, None, sep)  # a upper <= sep
-                b_buf = clamp_range(b_buf, sep, None)  # b lower >= sep
-                a["buffer"] = [round(a_buf[0], 2), round(a_buf[1], 2)]
-                b["buffer"] = [round(b_buf[0], 2), round(b_buf[1], 2)]
+                sep = (a.core[1] + b.core[0]) / 2.0
+                a.buffer = (round(min(a_lo, sep), 2), round(min(a_hi, sep), 2))  # a upper <= sep
+                b.buffer = (round(max(b_lo, sep), 2), round(max(b_hi, sep), 2))  # b lower >= sep
 
         # re-name after sort (stable)
         for idx, it in enumerate(side_items, start=1):
-            it["name"] = f"{'S' if side=='S' else 'R'}{idx}"
+            it.name = f"{'S' if side=='S' else 'R'}{idx}"
 
     _cap(supports, "S")
     _cap(resistances, "R")
 
-    assert_levels_ok(sym, price, atr_h4, supports, resistances)
+    # dicts only from here on: the check runs on exactly what gets published
+    supports_out = [lv.to_json() for lv in supports]
+    resistances_out = [lv.to_json() for lv in resistances]
+    assert_levels_ok(sym, price, atr_h4, supports_out, resistances_out)
 
     return {
         "price": price,
         "atr_h4": atr_h4,
         "range_w1": range_w1,
-        "supports": supports,
-        "resistances": resistances,
+        "supports": supports_out,
+        "resistances": resistances_out,
     }
 
 
@@ -665,139 +824,102 @@ def build_views_v2(state_full: Dict[str, Any]) -> Dict[str, Any]:
 def render_report(bundle: Dict[str, Any]) -> str:
     # proof header
     gen_utc = bundle["generated_utc"]
-    tallinn = ZoneInfo("Europe/Tallinn")
-    gen_local = datetime.fromisoformat(gen_utc.replace("Z", "+00:00")).astimezone(tallinn)
+    gen_local = parse_iso_z(gen_utc).astimezone(REPORT_TZ)
     gen_local_str = gen_local.strftime("%Y-%m-%d %H:%M:%S %Z")
 
     state_upd = bundle["sources"]["state"].get("updated_utc")
     state_sha = bundle["sources"]["state"]["sha256"]
     bundle_sha = bundle["bundle_sha256"]
 
-    lines: List[str] = []
-    lines.append("IRON-PROOF (НЕ РЕДАКТИРОВАТЬ)")
-    lines.append(f"- generated_utc: {gen_utc}")
-    lines.append(f"- generated_local: {gen_local_str}")
-    lines.append(f"- state.updated_utc: {state_upd}")
-    lines.append(f"- state.sha256: {state_sha}")
-    lines.append(f"- bundle.sha256: {bundle_sha}")
-    lines.append("")
-    lines.append("Ссылки (рукопожатие):")
-    for u in bundle.get("handshake_links", []):
-        lines.append(u)
-    lines.append("")
+    out = io.StringIO()
+    w = out.write
+    w("IRON-PROOF (НЕ РЕДАКТИРОВАТЬ)\n")
+    w(f"- generated_utc: {gen_utc}\n")
+    w(f"- generated_local: {gen_local_str}\n")
+    w(f"- state.updated_utc: {state_upd}\n")
+    w(f"- state.sha256: {state_sha}\n")
+    w(f"- bundle.sha256: {bundle_sha}\n")
+    w("\n")
+    w("Ссылки (рукопожатие):\n")
+    links = bundle.get("handshake_links", [])
+    w(HANDSHAKE_BLOCK if links == HANDSHAKE_LINKS else "".join(f"{u}\n" for u in links))
+    w("\n")
 
     fx = bundle["facts_index"]
 
     # Per symbol summary
     for sym in ("BTCUSDT", "ETHUSDT"):
-        lines.append(f"## {sym}")
+        w(f"## {sym}\n")
         prefix = "btc" if sym == "BTCUSDT" else "eth"
 
-        lines.append(f"- price(state): {fmt_num(fx.get(f'{prefix}.price'), 2)}")
+        w(f"- price(state): {fmt_num(fx.get(f'{prefix}.price'), 2)}\n")
         v = (bundle.get("views") or {}).get(sym) or {}
         rw = v.get("range_w1") if isinstance(v, dict) else None
         if isinstance(rw, dict) and rw.get("where") not in (None, "unknown"):
-            lines.append(
-                f"- range(W1): {rw.get('where')} | discount: {fmt_range(rw.get('discount'))} | mid: {fmt_num(rw.get('mid'), 2)} | premium: {fmt_range(rw.get('premium'))}"
+            w(
+                f"- range(W1): {rw.get('where')} | discount: {fmt_range(rw.get('discount'))} | mid: {fmt_num(rw.get('mid'), 2)} | premium: {fmt_range(rw.get('premium'))}\n"
             )
         else:
-            lines.append("- range(W1): unknown")
-        lines.append(f"- regime: {fx.get(f'{prefix}.regime')} | W1: {fx.get(f'{prefix}.trend.w1')} | D1: {fx.get(f'{prefix}.trend.d1')}")
-        lines.append(f"- ATR(D1): {fmt_num(fx.get(f'{prefix}.atr.d1'), 2)} | ATR(H4): {fmt_num(fx.get(f'{prefix}.atr.h4'), 2)}")
-        lines.append(f"- EMA200(D1): {fmt_num(fx.get(f'{prefix}.ema200.d1'), 2)} | EMA200(W1): {fmt_num(fx.get(f'{prefix}.ema200.w1'), 2)}")
-        lines.append("")
+            w("- range(W1): unknown\n")
+        w(f"- regime: {fx.get(f'{prefix}.regime')} | W1: {fx.get(f'{prefix}.trend.w1')} | D1: {fx.get(f'{prefix}.trend.d1')}\n")
+        w(f"- ATR(D1): {fmt_num(fx.get(f'{prefix}.atr.d1'), 2)} | ATR(H4): {fmt_num(fx.get(f'{prefix}.atr.h4'), 2)}\n")
+        w(f"- EMA200(D1): {fmt_num(fx.get(f'{prefix}.ema200.d1'), 2)} | EMA200(W1): {fmt_num(fx.get(f'{prefix}.ema200.w1'), 2)}\n")
+        w("\n")
 
         v = bundle.get("views", {}).get(sym, {}) or {}
         if "error" in v:
-            lines.append(f"### Уровни: ERROR ({v.get('error')})")
+            w(f"### Уровни: ERROR ({v.get('error')})\n")
         else:
-            lines.append("### 4 поддержки / 4 сопротивления (ZONE = рабочая зона)" if SIMPLE_LEVELS else "### 4 поддержки / 4 сопротивления (CORE = точка реакции, BUFFER = зона допуска)")
-            lines.append("Поддержки:")
-            for it in v.get("supports", []):
-                core = it.get("core")
-                buf = it.get("buffer")
-                st = it.get("strength", {})
-                beh = it.get("behavior")
-                role = it.get("role")
-
-                q_used = it.get("quality_macro_best") or it.get("quality_local") or {}
-                q_src = "macro" if it.get("quality_macro_best") else "local"
-
-                zone_txt = (
-
-                    f"ZONE {fmt_range(core)}"
-
-                    if SIMPLE_LEVELS or core == buf
-
-                    else f"CORE {fmt_range(core)} | BUF {fmt_range(buf)}"
-
-                )
-
-                lines.append(
-                    f"- {it['name']} ({role}, {beh}): {zone_txt} "
-                    f"{st.get('emoji','⚪')} (силa={st.get('level')}/5, {q_src}: tests={q_used.get('tests')}, rr={q_used.get('reaction_rate')}, fr={q_used.get('failure_rate')})"
-                )
-            lines.append("Сопротивления:")
-            for it in v.get("resistances", []):
-                core = it.get("core")
-                buf = it.get("buffer")
-                st = it.get("strength", {})
-                beh = it.get("behavior")
-                role = it.get("role")
-
-                q_used = it.get("quality_macro_best") or it.get("quality_local") or {}
-                q_src = "macro" if it.get("quality_macro_best") else "local"
-
-                zone_txt = (
-
-                    f"ZONE {fmt_range(core)}"
-
-                    if SIMPLE_LEVELS or core == buf
-
-                    else f"CORE {fmt_range(core)} | BUF {fmt_range(buf)}"
-
-                )
-
-                lines.append(
-                    f"- {it['name']} ({role}, {beh}): {zone_txt} "
-                    f"{st.get('emoji','⚪')} (силa={st.get('level')}/5, {q_src}: tests={q_used.get('tests')}, rr={q_used.get('reaction_rate')}, fr={q_used.get('failure_rate')})"
-                )
-        lines.append("")
+            w("### 4 поддержки / 4 сопротивления (ZONE = рабочая зона)\n" if SIMPLE_LEVELS else "### 4 поддержки / 4 сопротивления (CORE = точка реакции, BUFFER = зона допуска)\n")
+            for title, key in (("Поддержки:\n", "supports"), ("Сопротивления:\n", "resistances")):
+                w(title)
+                for it in v.get(key, []):
+                    core = it.get("core")
+                    buf = it.get("buffer")
+                    st = it.get("strength", {})
+                    beh = it.get("behavior")
+                    role = it.get("role")
+
+                    q_used = it.get("quality_macro_best") or it.get("quality_local") or {}
+                    q_src = "macro" if it.get("quality_macro_best") else "local"
+
+                    # core/buf are 2-decimal lists: compare them, format core once
+                    core_txt = fmt_range(core)
+                    zone_txt = (
+                        f"ZONE {core_txt}"
+                        if SIMPLE_LEVELS or core == buf
+                        else f"CORE {core_txt} | BUF {fmt_range(buf)}"
+                    )
+
+                    w(
+                        f"- {it['name']} ({role}, {beh}): {zone_txt} "
+                        f"{st.get('emoji','⚪')} (силa={st.get('level')}/5, {q_src}: tests={q_used.get('tests')}, rr={q_used.get('reaction_rate')}, fr={q_used.get('failure_rate')})\n"
+                    )
+        w("\n")
         # derivatives (live links; no GitHub dependency)
-        lines.append("### Деривативы (live ссылки Binance FAPI)")
-        if sym == "BTCUSDT":
-            lines.append("- premiumIndex: https://fapi.binance.com/fapi/v1/premiumIndex?symbol=BTCUSDT")
-            lines.append("- openInterest: https://fapi.binance.com/fapi/v1/openInterest?symbol=BTCUSDT")
-            lines.append("- openInterestHist(1h×30): https://fapi.binance.com/futures/data/openInterestHist?symbol=BTCUSDT&period=1h&limit=30")
-            lines.append("- fundingRate(×30): https://fapi.binance.com/fapi/v1/fundingRate?symbol=BTCUSDT&limit=30")
-        else:
-            lines.append("- premiumIndex: https://fapi.binance.com/fapi/v1/premiumIndex?symbol=ETHUSDT")
-            lines.append("- openInterest: https://fapi.binance.com/fapi/v1/openInterest?symbol=ETHUSDT")
-            lines.append("- openInterestHist(1h×30): https://fapi.binance.com/futures/data/openInterestHist?symbol=ETHUSDT&period=1h&limit=30")
-            lines.append("- fundingRate(×30): https://fapi.binance.com/fapi/v1/fundingRate?symbol=ETHUSDT&limit=30")
-        lines.append("")
+        w("### Деривативы (live ссылки Binance FAPI)\n")
+        w(DERIV_REPORT_LINES[sym])
+        w("\n")
 
-    return "\n".join(lines).strip() + "\n"
+    return out.getvalue().strip() + "\n"
 
 
 def main() -> None:
     if not CONTRACT_PATH.exists():
         raise SystemExit(f"Missing contract: {CONTRACT_PATH}")
 
-    contract = json.loads(CONTRACT_PATH.read_text(encoding="utf-8"))
+    contract, contract_sha = read_json_sha256(CONTRACT_PATH)
 
     state_path = Path(contract["inputs"]["state_path"])
 
     if not state_path.exists():
         raise SystemExit(f"Missing state input: {state_path} (run scripts/build_ta_state.py first)")
 
-    state = read_json(state_path)
+    # one read per input: parse + sha256 from the same bytes
+    state, state_sha = read_json_sha256(state_path)
     deriv = {}
 
-    facts = extract_facts(contract, state, deriv)
-    fx = facts_index(facts)
-
-    state_sha = sha256_file(state_path)
+    facts, fx = extract_facts(contract, state, deriv)
 
     generated_utc = iso_z(utc_now())
 
@@ -814,7 +936,7 @@ def main() -> None:
             },
             "contract": {
                 "path": str(CONTRACT_PATH),
-                "sha256": sha256_file(CONTRACT_PATH),
+                "sha256": contract_sha,
             },
         },
         "facts": facts,
@@ -825,30 +947,31 @@ def main() -> None:
     # Views/levels from FULL state
     bundle["views"] = build_views_v2(state)
 
+    rel_bundle = Path("ta/binance/chat_bundle_latest.json")
+    rel_report = Path("ta/binance/chat_report_latest.md")
+    rel_bundle_sha = Path("ta/binance/chat_bundle_latest.sha256")
+    rel_report_sha = Path("ta/binance/chat_report_latest.sha256")
+
     # compute sha for bundle (without self hashes first)
-    tmp = dict(bundle)
-    tmp.pop("bundle_sha256", None)
-    tmp.pop("report_sha256", None)
-    bundle_bytes = json.dumps(tmp, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
-    bundle_sha = sha256_bytes(bundle_bytes)
+    bundle_sha = bundle_sha256(bundle)
     bundle["bundle_sha256"] = bundle_sha
 
     # Render report and compute sha
     report = render_report(bundle)
-    report_sha = sha256_bytes(report.encode("utf-8"))
+    report_bytes = report.encode("utf-8")
+    report_sha = sha256_bytes(report_bytes)
     bundle["report_sha256"] = report_sha
 
-    # Write outputs (docs only)
-    rel_bundle = Path("ta/binance/chat_bundle_latest.json")
-    rel_report = Path("ta/binance/chat_report_latest.md")
-    rel_bundle_sha = Path("ta/binance/chat_bundle_latest.sha256")
-    rel_report_sha = Path("ta/binance/chat_report_latest.sha256")
-
+    # Write outputs (docs only). Encode each artifact once; every root gets the same bytes.
+    outputs = [
+        (rel_bundle, json_bytes(bundle)),
+        (rel_report, report_bytes),
+        (rel_bundle_sha, f"{bundle_sha}  {rel_bundle.name}\n".encode("utf-8")),
+        (rel_report_sha, f"{report_sha}  {rel_report.name}\n".encode("utf-8")),
+    ]
     for root in OUT_ROOTS:
-        write_json(root / rel_bundle, bundle)
-        write_text(root / rel_report, report)
-        write_text(root / rel_bundle_sha, f"{bundle_sha}  {rel_bundle.name}\n")
-        write_text(root / rel_report_sha, f"{report_sha}  {rel_report.name}\n")
+        for rel, data in outputs:
+            write_bytes(root / rel, data)
 
 
 if __name__ == "__main__":
@@ -18,16 +18,21 @@ Design principles:
 
 from __future__ import annotations
 
-import json
+import io
+from bisect import bisect_right
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from zoneinfo import ZoneInfo
 
 from iron_common import (
-    read_json, write_json, write_text, sha256_file, sha256_bytes,
-    json_pointer_get, coerce_number, safe_float_eq
+    read_json, read_json_sha256, write_json, json_bytes, write_bytes, sha256_file, sha256_bytes, bundle_sha256,
+    json_pointer_getter, safe_float_eq,
+    facts_index_matches
 )
 
 # We publish only to /docs (GitHub Pages). Root duplicates were removed on purpose.
@@ -58,17 +63,33 @@ HANDSHAKE_LINKS = [
     "https://data-api.binance.vision/api/v3/klines?symbol=ETHUSDT&interval=4h&limit=2",
     "https://data-api.binance.vision/api/v3/klines?symbol=ETHUSDT&interval=1h&limit=2",
     "https://data-api.binance.vision/api/v3/klines?symbol=ETHUSDT&interval=15m&limit=20",
-    # deriv (live, pull directly from Binance)
-    "https://fapi.binance.com/fapi/v1/premiumIndex?symbol=BTCUSDT",
-    "https://fapi.binance.com/fapi/v1/openInterest?symbol=BTCUSDT",
-    "https://fapi.binance.com/futures/data/openInterestHist?symbol=BTCUSDT&period=1h&limit=30",
-    "https://fapi.binance.com/fapi/v1/fundingRate?symbol=BTCUSDT&limit=30",
-    "https://fapi.binance.com/fapi/v1/premiumIndex?symbol=ETHUSDT",
-    "https://fapi.binance.com/fapi/v1/openInterest?symbol=ETHUSDT",
-    "https://fapi.binance.com/futures/data/openInterestHist?symbol=ETHUSDT&period=1h&limit=30",
-    "https://fapi.binance.com/fapi/v1/fundingRate?symbol=ETHUSDT&limit=30",
 ]
 
+# Live Binance FAPI derivative endpoints, one set per symbol: (report label, url template).
+DERIV_LINK_TEMPLATES = [
+    ("premiumIndex", "https://fapi.binance.com/fapi/v1/premiumIndex?symbol={s}"),
+    ("openInterest", "https://fapi.binance.com/fapi/v1/openInterest?symbol={s}"),
+    ("openInterestHist(1h×30)", "https://fapi.binance.com/futures/data/openInterestHist?symbol={s}&period=1h&limit=30"),
+    ("fundingRate(×30)", "https://fapi.binance.com/fapi/v1/fundingRate?symbol={s}&limit=30"),
+]
+DERIV_SYMBOLS = ("BTCUSDT", "ETHUSDT")
+
+# deriv (live, pull directly from Binance)
+HANDSHAKE_LINKS += [url.format(s=sym) for sym in DERIV_SYMBOLS for _, url in DERIV_LINK_TEMPLATES]
+
+# Report "Ссылки (рукопожатие)" block, rendered once.
+HANDSHAKE_BLOCK = "".join(f"{u}\n" for u in HANDSHAKE_LINKS)
+
+# Report "Деривативы" block per symbol, rendered once.
+DERIV_REPORT_LINES = {
+    sym: "".join(f"- {label}: {url.format(s=sym)}\n" for label, url in DERIV_LINK_TEMPLATES)
+    for sym in DERIV_SYMBOLS
+}
+
+
+# Report header shows local (Tallinn) time; one tz lookup per process.
+REPORT_TZ = ZoneInfo("Europe/Tallinn")
+
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc).replace(microsecond=0)
@@ -81,6 +102,12 @@ def iso_z(dt: datetime) -> str:
 def parse_iso_z(s: str) -> Optional[datetime]:
     if not isinstance(s, str) or not s:
         return None
+    return _parse_iso_z_str(s)
+
+
+# Levels of one symbol share candle timestamps; datetimes are immutable, so caching is safe.
+@lru_cache(maxsize=2048)
+def _parse_iso_z_str(s: str) -> Optional[datetime]:
     try:
         return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
     except Exception:
@@ -94,13 +121,23 @@ def days_since(ts_utc: Optional[str], now_utc: datetime) -> Optional[float]:
     return round((now_utc - dt).total_seconds() / 86400.0, 3)
 
 
+_THOUSANDS_TRANS = str.maketrans(",", " ")  # space thousands
+
+
+# Report numbers repeat (core/buffer bounds shared by neighbours, facts).
+@lru_cache(maxsize=1024)
+def _fmt_num2(v: float) -> str:
+    return format(v, ",.2f").translate(_THOUSANDS_TRANS)
+
+
 def fmt_num(x: Any, digits: int = 2) -> str:
     try:
         v = float(x)
     except Exception:
         return str(x)
-    s = f"{v:,.{digits}f}"
-    return s.replace(",", " ")  # space thousands
+    if digits == 2 and v:  # not 0.0: it shares a cache slot with -0.0
+        return _fmt_num2(v)
+    return format(v, f",.{digits}f").translate(_THOUSANDS_TRANS)
 
 
 def fmt_range(rng: Any, digits: int = 2) -> str:
@@ -109,27 +146,6 @@ def fmt_range(rng: Any, digits: int = 2) -> str:
     return f"[{fmt_num(rng[0], digits)} – {fmt_num(rng[1], digits)}]"
 
 
-def overlap(a: Tuple[float, float], b: Tuple[float, float]) -> bool:
-    return max(a[0], b[0]) <= min(a[1], b[1])
-
-
-def union(a: Tuple[float, float], b: Tuple[float, float]) -> Tuple[float, float]:
-    return (min(a[0], b[0]), max(a[1], b[1]))
-
-
-def clamp_range(r: Tuple[float, float], lo: Optional[float], hi: Optional[float]) -> Tuple[float, float]:
-    a, b = r
-    if lo is not None:
-        a = max(a, lo)
-        b = max(b, lo)
-    if hi is not None:
-        a = min(a, hi)
-        b = min(b, hi)
-    if a > b:
-        m = (a + b) / 2.0
-        return (m, m)
-    return (a, b)
-
 def assert_levels_ok(
     sym: str,
     price: float,
@@ -155,13 +171,31 @@ def assert_levels_ok(
         """
         return max(a[0], b[0]) < (min(a[1], b[1]) - eps)
 
+    def _overlap_pairs(ranges: List[Tuple[float, float]]) -> set:
+        # Sweep by low end: a range leaves the active set once nothing starting
+        # at or after the current low can overlap it. Returns (i, j), i < j.
+        pairs = set()
+        active: List[int] = []
+        for k in sorted(range(len(ranges)), key=ranges.__getitem__):
+            lo = ranges[k][0]
+            active = [j for j in active if ranges[j][1] - eps > lo]
+            for j in active:
+                if _ov(ranges[j], ranges[k]):
+                    pairs.add((min(j, k), max(j, k)))
+            active.append(k)
+        return pairs
+
     def _check(items: List[Dict[str, Any]], side: str) -> None:
         # range integrity + side correctness
+        cores: List[Tuple[float, float]] = []
+        bufs: List[Tuple[float, float]] = []
         for it in items:
             if "core" not in it or "buffer" not in it:
                 raise SystemExit(f"{sym}: missing core/buffer in level item: {it}")
             core = _norm(it["core"])
             buf = _norm(it["buffer"])
+            cores.append(core)
+            bufs.append(buf)
 
             if not (buf[0] - eps <= core[0] <= core[1] <= buf[1] + eps):
                 raise SystemExit(f"{sym}: core must be inside buffer (side={side}) core={core} buf={buf}")
@@ -174,25 +208,23 @@ def assert_levels_ok(
                 if core[0] < price - eps:
                     raise SystemExit(f"{sym}: resistance core below price: core={core} price={price}")
 
-        # ordering
-        if side == "S":
-            if items != sorted(items, key=lambda x: float(_norm(x["core"])[1]), reverse=True):
-                raise SystemExit(f"{sym}: supports not sorted (closest first)")
-        else:
-            if items != sorted(items, key=lambda x: float(_norm(x["core"])[0])):
-                raise SystemExit(f"{sym}: resistances not sorted (closest first)")
+        # ordering (closest first; equal keys allowed): one linear scan
+        for i in range(len(cores) - 1):
+            if side == "S":
+                if cores[i][1] < cores[i + 1][1]:
+                    raise SystemExit(f"{sym}: supports not sorted (closest first)")
+            else:
+                if cores[i][0] > cores[i + 1][0]:
+                    raise SystemExit(f"{sym}: resistances not sorted (closest first)")
 
         # non-overlap (core + buffer)
-        for i in range(len(items)):
-            for j in range(i + 1, len(items)):
-                ci = _norm(items[i]["core"])
-                cj = _norm(items[j]["core"])
-                if _ov(ci, cj):
-                    raise SystemExit(f"{sym}: overlapping CORES {items[i].get('name')} {ci} vs {items[j].get('name')} {cj}")
-                bi = _norm(items[i]["buffer"])
-                bj = _norm(items[j]["buffer"])
-                if _ov(bi, bj):
-                    raise SystemExit(f"{sym}: overlapping BUFFERS {items[i].get('name')} {bi} vs {items[j].get('name')} {bj}")
+        # first (i, j) in pair order, CORES before BUFFERS for the same pair
+        core_pairs = _overlap_pairs(cores)
+        pairs = core_pairs | _overlap_pairs(bufs)
+        if pairs:
+            i, j = min(pairs)
+            what, ranges = ("CORES", cores) if (i, j) in core_pairs else ("BUFFERS", bufs)
+            raise SystemExit(f"{sym}: overlapping {what} {items[i].get('name')} {ranges[i]} vs {items[j].get('name')} {ranges[j]}")
 
     _check(supports, "S")
     _check(resistances, "R")
@@ -218,13 +250,17 @@ def behavior_tag(tests: int, rr: Optional[float], fr: Optional[float]) -> str:
     return "mixed"
 
 
-def extract_facts(contract: Dict[str, Any], state: Any, deriv: Any) -> List[Dict[str, Any]]:
+def extract_facts(contract: Dict[str, Any], state: Any, deriv: Any) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Resolve contract facts; returns (facts list, facts_index {id: value}) in one pass."""
     facts: List[Dict[str, Any]] = []
+    fx: Dict[str, Any] = {}
+    # facts share long prefixes (/symbols/BTCUSDT/...): resolve each parent once
+    get_state = json_pointer_getter(state)
+    get_deriv = json_pointer_getter(deriv)
     for f in contract.get("facts", []):
         src = f["source"]
         ptr = f["pointer"]
-        doc = state if src == "state" else deriv
-        val = json_pointer_get(doc, ptr)
+        val = (get_state if src == "state" else get_deriv)(ptr)
         facts.append({
             "id": f["id"],
             "source": src,
@@ -232,11 +268,8 @@ def extract_facts(contract: Dict[str, Any], state: Any, deriv: Any) -> List[Dict
             "type": f.get("type", "any"),
             "value": val,
         })
-    return facts
-
-
-def facts_index(facts: List[Dict[str, Any]]) -> Dict[str, Any]:
-    return {f["id"]: f["value"] for f in facts}
+        fx[f["id"]] = val
+    return facts, fx
 
 
 
@@ -275,15 +308,18 @@ def _pick_local_levels(
     side: str,
     atr_h4: float,
     n: int = 4,
-) -> List[Dict[str, Any]]:
-    """Pick up to n disjoint local H4 zones closest to price on the correct side."""
-    out: List[Dict[str, Any]] = []
+) -> List[Tuple[Dict[str, Any], float, Tuple[float, float]]]:
+    """Pick up to n disjoint local H4 zones closest to price on the correct side.
+
+    Returns (item, distance_to_price, core) triples; the item dicts are not copied.
+    """
+    out: List[Tuple[Dict[str, Any], float, Tuple[float, float]]] = []
 
     # Gap to avoid overlaps between chosen levels
     gap = max(price * 0.00035, atr_h4 * 0.03)
 
     # Distance to price from a zone for the given side
-    cands: List[Tuple[float, float, Dict[str, Any]]] = []
+    cands: List[Tuple[float, float, Dict[str, Any], Tuple[float, float]]] = []
     for it in local_list or []:
         z = it.get("zone")
         if not isinstance(z, list) or len(z) != 2:
@@ -312,78 +348,74 @@ def _pick_local_levels(
         score = float(it.get("score") or 0.0)
         strength = float(it.get("strength") or 0.0)
         # prefer closer; then better score/strength
-        cands.append((dist, -(score + 10.0 * strength), it))
-
-    cands.sort(key=lambda x: (x[0], x[1]))
-
-    def _overlaps_any(z: Tuple[float, float]) -> bool:
-        for sel in out:
-            zl = sel["_core"]
-            if overlap(z, zl):
-                return True
-            # also avoid too tight adjacency
-            if z[0] <= zl[1] + gap and z[1] >= zl[0] - gap:
-                return True
-        return False
-
-    for dist, _, it in cands:
-        z = it.get("zone")
-        lo, hi = float(z[0]), float(z[1])
-        if lo > hi:
-            lo, hi = hi, lo
-        zr = (lo, hi)
-        if _overlaps_any(zr):
+        cands.append((dist, -(score + 10.0 * strength), it, (lo, hi)))
+
+    cands.sort(key=itemgetter(0, 1))
+
+    # Accepted cores are disjoint, kept sorted by lo (his are then sorted too),
+    # so only the neighbours around hi + gap can conflict with a candidate.
+    acc_lo: List[float] = []
+    acc_hi: List[float] = []
+
+    def _overlaps_any(z: Tuple[float, float]) -> int:
+        """-1 if z conflicts with an accepted core, else its insert position."""
+        k = bisect_right(acc_lo, z[1] + gap)
+        for j in (k - 1, k):
+            if 0 <= j < len(acc_lo):
+                zl0, zl1 = acc_lo[j], acc_hi[j]
+                if max(z[0], zl0) <= min(z[1], zl1):
+                    return -1
+                # also avoid too tight adjacency
+                if z[0] <= zl1 + gap and z[1] >= zl0 - gap:
+                    return -1
+        return k
+
+    for dist, _, it, zr in cands:
+        lo, hi = zr
+        k = _overlaps_any(zr)
+        if k < 0:
             continue
-        it2 = dict(it)
-        it2["_dist"] = float(dist)
-        it2["_core"] = zr
-        out.append(it2)
+        acc_lo.insert(k, lo)
+        acc_hi.insert(k, hi)
+        out.append((it, float(dist), zr))
         if len(out) >= n:
             break
 
     # sort for stable naming: supports top-down, resistances bottom-up
     if side == "S":
-        out.sort(key=lambda it: it["_core"][1], reverse=True)
+        out.sort(key=lambda p: p[2][1], reverse=True)
     else:
-        out.sort(key=lambda it: it["_core"][0])
+        out.sort(key=lambda p: p[2][0])
     return out
 
 
-def _macro_context(sym_state: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Collect macro bands/zones as context for buffer/behavior."""
-    out: List[Dict[str, Any]] = []
-    zones = (sym_state or {}).get("zones", {}) or {}
+MacroBand = Tuple[float, float, Optional[Dict[str, Any]], str]  # (lo, hi, quality, id)
+
 
+def _macro_context(
+    rw1: Dict[str, Any],
+    sd1: Dict[str, Any],
+    structural: Dict[str, Any],
+) -> Dict[str, List[MacroBand]]:
+    """Collect macro bands/zones as context for buffer/behavior, split by side."""
+    out: Dict[str, List[MacroBand]] = {"S": [], "R": []}
+    if not rw1 and not sd1 and not structural.get("supports") and not structural.get("resistances"):
+        return out  # degraded state (new listing/outage): nothing to walk
     # Range W1 discount/premium bands with reaction stats
-    rw1 = zones.get("range_w1") or {}
     for key, side in (("discount", "S"), ("premium", "R")):
         band = (rw1.get("bands") or {}).get(key)
         if isinstance(band, list) and len(band) == 2:
             q = _macro_quality_from_reaction((rw1.get("reaction") or {}).get(key))
-            out.append({
-                "id": f"range_w1.{key}",
-                "tf": "W1",
-                "side": side,
-                "range": (float(band[0]), float(band[1])),
-                "quality": q,
-            })
+            out[side].append((float(band[0]), float(band[1]), q, f"range_w1.{key}"))
 
     # Swing D1 entry bands with reaction stats
-    sd1 = zones.get("swing_d1") or {}
     for key, side in (("support_entry", "S"), ("resistance_entry", "R")):
         band = (sd1.get("bands") or {}).get(key)
         if isinstance(band, list) and len(band) == 2:
             q = _macro_quality_from_reaction((sd1.get("reaction") or {}).get(key))
-            out.append({
-                "id": f"swing_d1.{key}",
-                "tf": "D1",
-                "side": side,
-                "range": (float(band[0]), float(band[1])),
-                "quality": q,
-            })
+            out[side].append((float(band[0]), float(band[1]), q, f"swing_d1.{key}"))
 
     # Structural zones list (wide) — buffer only
-    structural = (zones.get("structural") or {})
     for side_key, side in (("supports", "S"), ("resistances", "R")):
         for i, it in enumerate(structural.get(side_key) or []):
             z = it.get("zone")
@@ -398,20 +430,13 @@ def _macro_context(sym_state: Dict[str, Any]) -> List[Dict[str, Any]]:
                     "failure_rate": None if fr is None else round(fr, 4),
                     "last_touch_utc": it.get("last_touch_utc"),
                 }
-                out.append({
-                    "id": f"struct.{side_key}.{i}",
-                    "tf": it.get("tf"),
-                    "side": side,
-                    "range": (float(z[0]), float(z[1])),
-                    "quality": q,
-                })
+                out[side].append((float(z[0]), float(z[1]), q, f"struct.{side_key}.{i}"))
     return out
 
 
 def _expand_buffer(
     core: Tuple[float, float],
-    macro: List[Dict[str, Any]],
-    side: str,
+    macro_side: List[MacroBand],
     atr_h4: float,
 ) -> Tuple[Tuple[float, float], List[str], Optional[Dict[str, Any]]]:
     """
@@ -419,6 +444,8 @@ def _expand_buffer(
     but do NOT let macro swallow other neighbour levels (cap later).
     Returns: (buffer, sources_used, best_macro_quality)
     """
+    if not macro_side:
+        return core, [], None
     buf = core
     used: List[str] = []
     best_q: Optional[Dict[str, Any]] = None
@@ -426,19 +453,12 @@ def _expand_buffer(
 
     near_tol = max(atr_h4 * 0.10, (core[1] - core[0]) * 0.50)
 
-    for m in macro:
-        if m.get("side") != side:
-            continue
-        mr = m.get("range")
-        if not isinstance(mr, tuple) or len(mr) != 2:
-            continue
-        r = (float(mr[0]), float(mr[1]))
+    for lo, hi, q, mid in macro_side:
         # overlap OR close enough
-        if overlap(buf, r) or abs(r[0] - buf[1]) <= near_tol or abs(buf[0] - r[1]) <= near_tol:
-            buf = union(buf, r)
-            used.append(m.get("id", "macro"))
+        if max(buf[0], lo) <= min(buf[1], hi) or abs(lo - buf[1]) <= near_tol or abs(buf[0] - hi) <= near_tol:
+            buf = (min(buf[0], lo), max(buf[1], hi))
+            used.append(mid)
 
-        q = m.get("quality")
         if isinstance(q, dict):
             tests = float(q.get("tests") or 0.0)
             rr = q.get("reaction_rate")
@@ -453,6 +473,41 @@ def _expand_buffer(
     return buf, used, best_q
 
 
+@dataclass(slots=True)
+class Level:
+    """One 4S/4R level while it is assembled/capped; to_json() at the bundle boundary."""
+    name: str
+    role: str
+    behavior: str
+    tf_core: str
+    core: Tuple[float, float]
+    buffer: Tuple[float, float]
+    strength_level: int
+    strength_emoji: str
+    quality_local: Dict[str, Any]
+    quality_macro_best: Optional[Dict[str, Any]]
+    distance_to_price: float
+    sources: List[str]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "role": self.role,
+            "behavior": self.behavior,         # bounce / magnet / mixed / unknown
+            "tf_core": self.tf_core,
+            "core": list(self.core),
+            "buffer": list(self.buffer),
+            "strength": {
+                "level": self.strength_level,
+                "emoji": self.strength_emoji,
+            },
+            "quality_local": self.quality_local,
+            "quality_macro_best": self.quality_macro_best,
+            "distance_to_price": self.distance_to_price,
+            "sources": self.sources,
+        }
+
+
 def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> Dict[str, Any]:
     """
     Deterministic 4 supports + 4 resistances:
@@ -467,12 +522,15 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
     price = float(data.get("price") or 0.0)
     atr_h4 = float(((vol.get("atr14") or {}).get("H4")) or 0.0)
 
+    # zone groups are looked up once here and handed to the helpers
     local = (zones.get("local_h4") or {})
+    structural = (zones.get("structural") or {})
+    rw1 = zones.get("range_w1") or {}
+    sd1 = zones.get("swing_d1") or {}
+
     local_raw_s = list(local.get("supports") or [])
     local_raw_r = list(local.get("resistances") or [])
 
-    structural = (zones.get("structural") or {})
-
     def _struct_to_local(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
         for it in items or []:
@@ -480,7 +538,8 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
             if isinstance(z, list) and len(z) == 2:
                 lo = float(min(z[0], z[1]))
                 hi = float(max(z[0], z[1]))
-                it2 = dict(it)
+                # only the fields the level picker / _mk_items read, not a full copy
+                it2 = {k: it[k] for k in ("tf", "touches", "rejections", "last_touch_utc") if k in it}
                 it2["zone"] = [lo, hi]
                 # make it comparable with local candidates
                 it2["score"] = float(it.get("touches") or 0) * 10.0
@@ -491,21 +550,14 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
     # Combine local + structural, then pick 4 disjoint levels (core ranges) deterministically.
     local_s = _pick_local_levels(local_raw_s + _struct_to_local(structural.get("supports") or []), price, "S", atr_h4, 4)
     local_r = _pick_local_levels(local_raw_r + _struct_to_local(structural.get("resistances") or []), price, "R", atr_h4, 4)
-    macro = _macro_context(sym_state)
+    macro = _macro_context(rw1, sd1, structural)
 
-    def _mk_items(items: List[Dict[str, Any]], side: str) -> List[Dict[str, Any]]:
-        out: List[Dict[str, Any]] = []
-        for i, it in enumerate(items[:4], start=1):
-            core = it.get("_core")
-            if not isinstance(core, tuple) or len(core) != 2:
-                z = it.get("zone")
-                core = (float(z[0]), float(z[1])) if isinstance(z, list) and len(z) == 2 else (0.0, 0.0)
-            core = (float(core[0]), float(core[1]))
-            if core[0] > core[1]:
-                core = (core[1], core[0])
+    def _mk_items(items: List[Tuple[Dict[str, Any], float, Tuple[float, float]]], side: str) -> List[Level]:
+        out: List[Level] = []
+        for i, (it, dist, core) in enumerate(items[:4], start=1):
 
             q_local = _local_quality(it, now_utc)
-            buf, used, q_macro_best = _expand_buffer(core, macro, side, atr_h4)
+            buf, used, q_macro_best = _expand_buffer(core, macro[side], atr_h4)
 
             # choose quality for emoji/behavior: prefer macro reaction stats if present, else local
             q_for_rate = q_macro_best if isinstance(q_macro_best, dict) else q_local
@@ -527,7 +579,6 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
             else:
                 strength_level = max(1, base_strength) if base_strength else 1
 
-            dist = float(it.get("_dist") or 0.0)
             # role label by index (practical): closer = oper, mid = struct, far = macro
             if i <= 2:
                 role = "oper"
@@ -536,66 +587,64 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
             else:
                 role = "macro"
 
-            out.append({
-                "name": f"{'S' if side=='S' else 'R'}{i}",
-                "role": role,
-                "behavior": beh,         # bounce / magnet / mixed / unknown
-                "tf_core": it.get("tf", "H4"),
-                "core": [round(core[0], 2), round(core[1], 2)],
-                "buffer": [round(buf[0], 2), round(buf[1], 2)],
-                "strength": {
-                    "level": int(strength_level),
-                    "emoji": emoji,
-                },
-                "quality_local": q_local,
-                "quality_macro_best": q_macro_best,
-                "distance_to_price": round(dist, 2),
-                "sources": ["local_h4"] + used,
-            })
+            out.append(Level(
+                name=f"{'S' if side=='S' else 'R'}{i}",
+                role=role,
+                behavior=beh,
+                tf_core=it.get("tf", "H4"),
+                core=(round(core[0], 2), round(core[1], 2)),
+                buffer=(round(buf[0], 2), round(buf[1], 2)),
+                strength_level=int(strength_level),
+                strength_emoji=emoji,
+                quality_local=q_local,
+                quality_macro_best=q_macro_best,
+                distance_to_price=round(dist, 2),
+                sources=["local_h4"] + used,
+            ))
         return out
 
     supports = _mk_items(local_s, "S")
     resistances = _mk_items(local_r, "R")
 
     # Cap buffers to avoid overlaps between adjacent levels
-    def _cap(side_items: List[Dict[str, Any]], side: str) -> None:
+    def _cap(side_items: List[Level], side: str) -> None:
         # sort by core position
         if side == "S":
-            side_items.sort(key=lambda x: x["core"][1], reverse=True)
+            side_items.sort(key=lambda x: x.core[1], reverse=True)
         else:
-            side_items.sort(key=lambda x: x["core"][0])
+            side_items.sort(key=lambda x: x.core[0])
 
         # separators between neighbours using cores (not buffers)
         for i in range(len(side_items) - 1):
             a = side_items[i]
             b = side_items[i + 1]
+            # buffers are ordered (lo <= hi), so clamping to one side of
+            # `sep` is a plain max/min
+            a_lo, a_hi = a.buffer
+            b_lo, b_hi = b.buffer
             if side == "S":
-                sep = (a["core"][0] + b["core"][1]) / 2.0
-                a_buf = (a["buffer"][0], a["buffer"][1])
-                b_buf = (b["buffer"][0], b["buffer"][1])
-                a_buf = clamp_range(a_buf, sep, None)  # a lower bound >= sep
-                b_buf = clamp_range(b_buf, None, sep)  # b upper bound <= sep
-                a["buffer"] = [round(a_buf[0], 2), round(a_buf[1], 2)]
-                b["buffer"] = [round(b_buf[0], 2), round(b_buf[1], 2)]
+                sep = (a.core[0] + b.core[1]) / 2.0
+                a.buffer = (round(max(a_lo, sep), 2), round(max(a_hi, sep), 2))  # a lower bound >= sep
+                b.buffer = (round(min(b_lo, sep), 2), round(min(b_hi, sep), 2))  # b upper bound <= sep
             else:
-                sep = (a["core"][1] + b["core"][0]) / 2.0
-                a_buf = (a["buffer"][0], a["buffer"][1])
-                b_buf = (b["buffer"][0], b["buffer"][1])
-                a_buf = clamp_range(a_buf, None, sep)  # a upper <= sep
-                b_buf = clamp_range(b_buf, sep, None)  # b lower >= sep
-                a["buffer"] = [round(a_buf[0], 2), round(a_buf[1], 2)]
-                b["buffer"] = [round(b_buf[0], 2), round(b_buf[1], 2)]
+                sep = (a.core[1] + b.core[0]) / 2.0
+                a.buffer = (round(min(a_lo, sep), 2), round(min(a_hi, sep), 2))  # a upper <= sep
+                b.buffer = (round(max(b_lo, sep), 2), round(max(b_hi, sep), 2))  # b lower >= sep
 
         # re-name after sort (stable)
         for idx, it in enumerate(side_items, start=1):
-            it["name"] = f"{'S' if side=='S' else 'R'}{idx}"
+            it.name = f"{'S' if side=='S' else 'R'}{idx}"
 
     _cap(supports, "S")
     _cap(resistances, "R")
 
+    # dicts only from here on: the check runs on exactly what gets published
+    supports_out = [lv.to_json() for lv in supports]
+    resistances_out = [lv.to_json() for lv in resistances]
+
     issues: Dict[str, List[str]] = {"warnings": [], "errors": []}
     try:
-        assert_levels_ok(sym, price, atr_h4, supports, resistances)
+        assert_levels_ok(sym, price, atr_h4, supports_out, resistances_out)
     except SystemExit as e:
         issues["errors"].append(str(e))
     except Exception as e:
@@ -604,9 +653,11 @@ def build_levels_v2(sym: str, sym_state: Dict[str, Any], now_utc: datetime) -> D
     out = {
         "price": price,
         "atr_h4": atr_h4,
-        "supports": supports,
-        "resistances": resistances,
+        "supports": supports_out,
+        "resistances": resistances_out,
+        "issues": issues,
     }
+    return out
 
 
 def build_views_v2(state_full: Dict[str, Any]) -> Dict[str, Any]:
@@ -616,7 +667,11 @@ def build_views_v2(state_full: Dict[str, Any]) -> Dict[str, Any]:
     for sym in ("BTCUSDT", "ETHUSDT"):
         st = symbols.get(sym) or {}
         if isinstance(st, dict) and "error" not in st:
-            out[sym] = build_levels_v2(sym, st, now_utc)
+            v = build_levels_v2(sym, st, now_utc)
+            for side, what in (("supports", "support"), ("resistances", "resistance")):
+                if not v[side]:
+                    v["issues"]["errors"].append(f"{sym}: no {what} levels picked (no local/structural zone on that side of price?)")
+            out[sym] = v
         else:
             out[sym] = {"error": st.get("error") if isinstance(st, dict) else "missing"}
     return out
@@ -625,91 +680,68 @@ def build_views_v2(state_full: Dict[str, Any]) -> Dict[str, Any]:
 def render_report(bundle: Dict[str, Any]) -> str:
     # proof header
     gen_utc = bundle["generated_utc"]
-    tallinn = ZoneInfo("Europe/Tallinn")
-    gen_local = datetime.fromisoformat(gen_utc.replace("Z", "+00:00")).astimezone(tallinn)
+    gen_local = parse_iso_z(gen_utc).astimezone(REPORT_TZ)
     gen_local_str = gen_local.strftime("%Y-%m-%d %H:%M:%S %Z")
 
     state_upd = bundle["sources"]["state"].get("updated_utc")
     state_sha = bundle["sources"]["state"]["sha256"]
     bundle_sha = bundle["bundle_sha256"]
 
-    lines: List[str] = []
-    lines.append("IRON-PROOF (НЕ РЕДАКТИРОВАТЬ)")
-    lines.append(f"- generated_utc: {gen_utc}")
-    lines.append(f"- generated_local: {gen_local_str}")
-    lines.append(f"- state.updated_utc: {state_upd}")
-    lines.append(f"- state.sha256: {state_sha}")
-    lines.append(f"- bundle.sha256: {bundle_sha}")
-    lines.append("")
-    lines.append("Ссылки (рукопожатие):")
-    for u in bundle.get("handshake_links", []):
-        lines.append(u)
-    lines.append("")
+    out = io.StringIO()
+    w = out.write
+    w("IRON-PROOF (НЕ РЕДАКТИРОВАТЬ)\n")
+    w(f"- generated_utc: {gen_utc}\n")
+    w(f"- generated_local: {gen_local_str}\n")
+    w(f"- state.updated_utc: {state_upd}\n")
+    w(f"- state.sha256: {state_sha}\n")
+    w(f"- bundle.sha256: {bundle_sha}\n")
+    w("\n")
+    w("Ссылки (рукопожатие):\n")
+    links = bundle.get("handshake_links", [])
+    w(HANDSHAKE_BLOCK if links == HANDSHAKE_LINKS else "".join(f"{u}\n" for u in links))
+    w("\n")
 
     fx = bundle["facts_index"]
 
     # Per symbol summary
     for sym in ("BTCUSDT", "ETHUSDT"):
-        lines.append(f"## {sym}")
+        w(f"## {sym}\n")
         prefix = "btc" if sym == "BTCUSDT" else "eth"
 
-        lines.append(f"- price(state): {fmt_num(fx.get(f'{prefix}.price'), 2)}")
-        lines.append(f"- regime: {fx.get(f'{prefix}.regime')} | W1: {fx.get(f'{prefix}.trend.w1')} | D1: {fx.get(f'{prefix}.trend.d1')}")
-        lines.append(f"- ATR(D1): {fmt_num(fx.get(f'{prefix}.atr.d1'), 2)} | ATR(H4): {fmt_num(fx.get(f'{prefix}.atr.h4'), 2)}")
-        lines.append(f"- EMA200(D1): {fmt_num(fx.get(f'{prefix}.ema200.d1'), 2)} | EMA200(W1): {fmt_num(fx.get(f'{prefix}.ema200.w1'), 2)}")
-        lines.append("")
+        w(f"- price(state): {fmt_num(fx.get(f'{prefix}.price'), 2)}\n")
+        w(f"- regime: {fx.get(f'{prefix}.regime')} | W1: {fx.get(f'{prefix}.trend.w1')} | D1: {fx.get(f'{prefix}.trend.d1')}\n")
+        w(f"- ATR(D1): {fmt_num(fx.get(f'{prefix}.atr.d1'), 2)} | ATR(H4): {fmt_num(fx.get(f'{prefix}.atr.h4'), 2)}\n")
+        w(f"- EMA200(D1): {fmt_num(fx.get(f'{prefix}.ema200.d1'), 2)} | EMA200(W1): {fmt_num(fx.get(f'{prefix}.ema200.w1'), 2)}\n")
+        w("\n")
 
         v = bundle.get("views", {}).get(sym, {}) or {}
         if "error" in v:
-            lines.append(f"### Уровни: ERROR ({v.get('error')})")
+            w(f"### Уровни: ERROR ({v.get('error')})\n")
         else:
-            lines.append("### 4 поддержки / 4 сопротивления (CORE = точка реакции, BUFFER = зона допуска)")
-            lines.append("Поддержки:")
-            for it in v.get("supports", []):
-                core = it.get("core")
-                buf = it.get("buffer")
-                st = it.get("strength", {})
-                beh = it.get("behavior")
-                role = it.get("role")
-
-                q_used = it.get("quality_macro_best") or it.get("quality_local") or {}
-                q_src = "macro" if it.get("quality_macro_best") else "local"
-
-                lines.append(
-                    f"- {it['name']} ({role}, {beh}): CORE {fmt_range(core)} | BUF {fmt_range(buf)} "
-                    f"{st.get('emoji','⚪')} (силa={st.get('level')}/5, {q_src}: tests={q_used.get('tests')}, rr={q_used.get('reaction_rate')}, fr={q_used.get('failure_rate')})"
-                )
-            lines.append("Сопротивления:")
-            for it in v.get("resistances", []):
-                core = it.get("core")
-                buf = it.get("buffer")
-                st = it.get("strength", {})
-                beh = it.get("behavior")
-                role = it.get("role")
-
-                q_used = it.get("quality_macro_best") or it.get("quality_local") or {}
-                q_src = "macro" if it.get("quality_macro_best") else "local"
-
-                lines.append(
-                    f"- {it['name']} ({role}, {beh}): CORE {fmt_range(core)} | BUF {fmt_range(buf)} "
-                    f"{st.get('emoji','⚪')} (силa={st.get('level')}/5, {q_src}: tests={q_used.get('tests')}, rr={q_used.get('reaction_rate')}, fr={q_used.get('failure_rate')})"
-                )
-        lines.append("")
+            w("### 4 поддержки / 4 сопротивления (CORE = точка реакции, BUFFER = зона допуска)\n")
+            for title, key in (("Поддержки:\n", "supports"), ("Сопротивления:\n", "resistances")):
+                w(title)
+                for it in v.get(key, []):
+                    core = it.get("core")
+                    buf = it.get("buffer")
+                    st = it.get("strength", {})
+                    beh = it.get("behavior")
+                    role = it.get("role")
+
+                    q_used = it.get("quality_macro_best") or it.get("quality_local") or {}
+                    q_src = "macro" if it.get("quality_macro_best") else "local"
+
+                    w(
+                        f"- {it['name']} ({role}, {beh}): CORE {fmt_range(core)} | BUF {fmt_range(buf)} "
+                        f"{st.get('emoji','⚪')} (силa={st.get('level')}/5, {q_src}: tests={q_used.get('tests')}, rr={q_used.get('reaction_rate')}, fr={q_used.get('failure_rate')})\n"
+                    )
+        w("\n")
         # derivatives (live links; no GitHub dependency)
-        lines.append("### Деривативы (live ссылки Binance FAPI)")
-        if sym == "BTCUSDT":
-            lines.append("- premiumIndex: https://fapi.binance.com/fapi/v1/premiumIndex?symbol=BTCUSDT")
-            lines.append("- openInterest: https://fapi.binance.com/fapi/v1/openInterest?symbol=BTCUSDT")
-            lines.append("- openInterestHist(1h×30): https://fapi.binance.com/futures/data/openInterestHist?symbol=BTCUSDT&period=1h&limit=30")
-            lines.append("- fundingRate(×30): https://fapi.binance.com/fapi/v1/fundingRate?symbol=BTCUSDT&limit=30")
-        else:
-            lines.append("- premiumIndex: https://fapi.binance.com/fapi/v1/premiumIndex?symbol=ETHUSDT")
-            lines.append("- openInterest: https://fapi.binance.com/fapi/v1/openInterest?symbol=ETHUSDT")
-            lines.append("- openInterestHist(1h×30): https://fapi.binance.com/futures/data/openInterestHist?symbol=ETHUSDT&period=1h&limit=30")
-            lines.append("- fundingRate(×30): https://fapi.binance.com/fapi/v1/fundingRate?symbol=ETHUSDT&limit=30")
-        lines.append("")
+        w("### Деривативы (live ссылки Binance FAPI)\n")
+        w(DERIV_REPORT_LINES[sym])
+        w("\n")
 
-    return "\n".join(lines).strip() + "\n"
+    return out.getvalue().strip() + "\n"
 
 
 def main() -> None:
@@ -750,8 +782,18 @@ def main() -> None:
         else:
             status["quality"] = "OK"
 
-    def _verify_candidate(contract_obj: Dict[str, Any], bundle: Dict[str, Any], report: str) -> None:
+    def _verify_candidate(
+        contract_obj: Dict[str, Any],
+        bundle: Dict[str, Any],
+        report: str,
+        *,
+        known: Optional[Dict[str, Any]] = None,
+    ) -> None:
         # Best-effort self-verify (same spirit as verify_chat_bundle.py), but without aborting the run.
+        # known: what the build just computed for this in-memory bundle
+        #   bundle_sha -> canonical hash, not re-serialized
+        #   report_sha -> report hash, not re-encoded
+        known = known or {}
         errs: List[str] = []
         warns: List[str] = []
 
@@ -776,20 +818,21 @@ def main() -> None:
             errs.append(f"verify: contract.sha256 mismatch: computed={contract_sha} bundle={bundle['sources']['contract'].get('sha256')}")
 
         # Bundle sha (excluding self-hashes)
-        tmp = dict(bundle)
-        tmp.pop("bundle_sha256", None)
-        tmp.pop("report_sha256", None)
-        bundle_bytes = json.dumps(tmp, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
-        bundle_sha = sha256_bytes(bundle_bytes)
+        bundle_sha = known.get("bundle_sha")
+        if bundle_sha is None:
+            bundle_sha = bundle_sha256(bundle)
         if bundle_sha != bundle.get("bundle_sha256"):
             errs.append(f"verify: bundle.sha256 mismatch: computed={bundle_sha} bundle={bundle.get('bundle_sha256')}")
 
         # Report sha
-        report_sha = sha256_bytes(report.encode("utf-8"))
+        report_sha = known.get("report_sha")
+        if report_sha is None:
+            report_sha = sha256_bytes(report.encode("utf-8"))
         if report_sha != bundle.get("report_sha256"):
             errs.append(f"verify: report.sha256 mismatch: computed={report_sha} bundle={bundle.get('report_sha256')}")
 
         # Facts pointers
+        # always re-read from disk: facts[].value came from the in-memory state
         try:
             state_doc = read_json(state_path) if state_path else {}
         except Exception as e:
@@ -797,10 +840,12 @@ def main() -> None:
             state_doc = {}
 
         deriv_doc: Dict[str, Any] = {}
+        # shared pointer prefixes (/symbols/BTCUSDT/...) are walked once per doc
+        get_state = json_pointer_getter(state_doc)
+        get_deriv = json_pointer_getter(deriv_doc)
 
         fx: Dict[str, Any] = bundle.get("facts_index", {}) or {}
-        fx2 = {f.get("id"): f.get("value") for f in bundle.get("facts", [])}
-        if fx2 != fx:
+        if not facts_index_matches(bundle.get("facts", []), fx):
             errs.append("verify: facts_index mismatch (facts_index must exactly match facts[] list)")
 
         for f in bundle.get("facts", []) or []:
@@ -809,8 +854,7 @@ def main() -> None:
                 src = f["source"]
                 ptr = f["pointer"]
                 expected = f.get("value")
-                doc = state_doc if src == "state" else deriv_doc
-                actual = json_pointer_get(doc, ptr)
+                actual = (get_state if src == "state" else get_deriv)(ptr)
                 if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
                     if not safe_float_eq(float(expected), float(actual)):
                         errs.append(f"verify: fact mismatch {fid}: expected={expected} actual={actual} ptr={ptr} src={src}")
@@ -844,19 +888,34 @@ def main() -> None:
             # True only for a real overlap; touching is allowed.
             return max(a[0], b[0]) < (min(a[1], b[1]) - eps)
 
+        def _overlap_pairs(ranges: List[Optional[tuple]], eps: float) -> set:
+            # Sweep by low end: a range leaves the active set once nothing starting
+            # at or after the current low can overlap it. Returns (i, j), i < j.
+            pairs = set()
+            active: List[int] = []
+            for k in sorted((k for k, r in enumerate(ranges) if r), key=lambda k: ranges[k][0]):
+                lo = ranges[k][0]
+                active = [j for j in active if ranges[j][1] - eps > lo]
+                for j in active:
+                    if _ov(ranges[j], ranges[k], eps):
+                        pairs.add((j, k) if j < k else (k, j))
+                active.append(k)
+            return pairs
+
         def _check_side(sym_key: str, side: str, price: float, atr_h4: float, items: List[Dict[str, Any]]) -> None:
             eps = max(atr_h4 * 1e-3, price * 1e-6, 1e-9)
 
-            if side == "S":
-                want = sorted(items, key=lambda x: _norm_range(x.get("core"))[1] if _norm_range(x.get("core")) else 0.0, reverse=True)
-            else:
-                want = sorted(items, key=lambda x: _norm_range(x.get("core"))[0] if _norm_range(x.get("core")) else 0.0)
-            if items != want:
+            # normalized once per item; the checks below only index these lists
+            cores = [_norm_range(it.get("core")) for it in items]
+
+            k = 1 if side == "S" else 0
+            keys = [c[k] if c else 0.0 for c in cores]
+            if keys != sorted(keys, reverse=(side == "S")):
                 errs.append(f"verify: {sym_key}: {side} ordering invalid (closest first)")
 
-            for it in items:
-                core = _norm_range(it.get("core"))
-                buf = _norm_range(it.get("buffer"))
+            bufs = [_norm_range(it.get("buffer")) for it in items]
+
+            for it, core, buf in zip(items, cores, bufs):
                 if core is None or buf is None:
                     errs.append(f"verify: {sym_key}: bad core/buffer format: {it}")
                     continue
@@ -870,16 +929,14 @@ def main() -> None:
                     if core[0] < price - eps:
                         errs.append(f"verify: {sym_key}: resistance core below price core={core} price={price}")
 
-            for i in range(len(items)):
-                for j in range(i + 1, len(items)):
-                    ci = _norm_range(items[i].get("core"))
-                    cj = _norm_range(items[j].get("core"))
-                    if ci and cj and _ov(ci, cj, eps):
-                        errs.append(f"verify: {sym_key}: overlapping CORES {items[i].get('name')} {ci} vs {items[j].get('name')} {cj}")
-                    bi = _norm_range(items[i].get("buffer"))
-                    bj = _norm_range(items[j].get("buffer"))
-                    if bi and bj and _ov(bi, bj, eps):
-                        errs.append(f"verify: {sym_key}: overlapping BUFFERS {items[i].get('name')} {bi} vs {items[j].get('name')} {bj}")
+            # every overlapping pair is reported, in (i, j) order, CORES before BUFFERS
+            core_pairs = _overlap_pairs(cores, eps)
+            buf_pairs = _overlap_pairs(bufs, eps)
+            for i, j in sorted(core_pairs | buf_pairs):
+                if (i, j) in core_pairs:
+                    errs.append(f"verify: {sym_key}: overlapping CORES {items[i].get('name')} {cores[i]} vs {items[j].get('name')} {cores[j]}")
+                if (i, j) in buf_pairs:
+                    errs.append(f"verify: {sym_key}: overlapping BUFFERS {items[i].get('name')} {bufs[i]} vs {items[j].get('name')} {bufs[j]}")
 
         def _check_sym(sym_key: str, prefix: str) -> None:
             v = (bundle.get("views") or {}).get(sym_key) or {}
@@ -911,14 +968,17 @@ def main() -> None:
 
     # --- build candidate (best-effort) ---
     contract = None
+    contract_sha: Optional[str] = None
     state = None
+    state_sha: Optional[str] = None
     state_path: Optional[Path] = None
 
     if not CONTRACT_PATH.exists():
         status["errors"].append(f"Missing contract: {CONTRACT_PATH}")
     else:
         try:
-            contract = json.loads(CONTRACT_PATH.read_text(encoding="utf-8"))
+            # one read serves both the parse and the provenance hash
+            contract, contract_sha = read_json_sha256(CONTRACT_PATH)
         except Exception as e:
             status["errors"].append(f"Contract read/parse error: {e}")
 
@@ -933,12 +993,13 @@ def main() -> None:
             status["errors"].append(f"Missing state input: {state_path} (run scripts/build_ta_state.py first)")
         else:
             try:
-                state = read_json(state_path)
+                state, state_sha = read_json_sha256(state_path)
             except Exception as e:
                 status["errors"].append(f"State read/parse error: {e}")
 
     candidate_bundle: Optional[Dict[str, Any]] = None
     candidate_report: Optional[str] = None
+    candidate_report_bytes: Optional[bytes] = None
     candidate_bundle_sha: Optional[str] = None
     candidate_report_sha: Optional[str] = None
 
@@ -946,10 +1007,7 @@ def main() -> None:
         try:
             deriv: Dict[str, Any] = {}
 
-            facts = extract_facts(contract, state, deriv)
-            fx = facts_index(facts)
-
-            state_sha = sha256_file(state_path)
+            facts, fx = extract_facts(contract, state, deriv)
 
             candidate_bundle = {
                 "schema": "iron.chat_bundle.v3",
@@ -964,7 +1022,7 @@ def main() -> None:
                     },
                     "contract": {
                         "path": str(CONTRACT_PATH),
-                        "sha256": sha256_file(CONTRACT_PATH),
+                        "sha256": contract_sha,
                     },
                 },
                 "facts": facts,
@@ -981,33 +1039,40 @@ def main() -> None:
                 if isinstance(v, dict):
                     if "error" in v:
                         status["errors"].append(f"{sym}: {v.get('error')}")
+                    # level issues already name the symbol (assert_levels_ok / build_views_v2)
                     iss = v.get("issues") or {}
-                    for w in (iss.get("warnings") or []):
-                        status["warnings"].append(f"{sym}: {w}")
-                    for e in (iss.get("errors") or []):
-                        status["errors"].append(f"{sym}: {e}")
+                    status["warnings"].extend(iss.get("warnings") or [])
+                    status["errors"].extend(iss.get("errors") or [])
 
             # compute sha for bundle (without self hashes first)
-            tmp = dict(candidate_bundle)
-            tmp.pop("bundle_sha256", None)
-            tmp.pop("report_sha256", None)
-            bundle_bytes = json.dumps(tmp, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
-            candidate_bundle_sha = sha256_bytes(bundle_bytes)
+            candidate_bundle_sha = bundle_sha256(candidate_bundle)
             candidate_bundle["bundle_sha256"] = candidate_bundle_sha
 
             # Render report and compute sha
             candidate_report = render_report(candidate_bundle)
-            candidate_report_sha = sha256_bytes(candidate_report.encode("utf-8"))
+            candidate_report_bytes = candidate_report.encode("utf-8")
+            candidate_report_sha = sha256_bytes(candidate_report_bytes)
             candidate_bundle["report_sha256"] = candidate_report_sha
 
             # Self-verify candidate before deciding publish target
-            _verify_candidate(contract, candidate_bundle, candidate_report)
+            _verify_candidate(
+                contract, candidate_bundle, candidate_report,
+                known={
+                    "bundle_sha": candidate_bundle_sha,
+                    "report_sha": candidate_report_sha,
+                },
+            )
 
         except Exception as e:
             status["errors"].append(f"Build exception: {e}")
 
     _set_quality()
 
+    # Encode the candidate once; every root (and either target) gets the same bytes.
+    # (The report was encoded once already, for its sha.)
+    if candidate_bundle is not None and candidate_report is not None:
+        candidate_bundle_bytes = json_bytes(candidate_bundle)
+
     # Decide publish target per root (docs/)
     for root in OUT_ROOTS:
         has_last_good = (root / rel_bundle_latest).exists() and (root / rel_report_latest).exists()
@@ -1021,7 +1086,7 @@ def main() -> None:
                     "bundle_rel": str(rel_bundle_latest),
                     "report_rel": str(rel_report_latest),
                     "bundle_sha256": sha256_file(root / rel_bundle_latest),
-                    "report_sha256": sha256_bytes((root / rel_report_latest).read_text(encoding="utf-8").encode("utf-8")),
+                    "report_sha256": sha256_file(root / rel_report_latest),
                 }
             else:
                 status["published"] = None
@@ -1043,15 +1108,17 @@ def main() -> None:
                     "bundle_rel": str(rel_bundle_latest),
                     "report_rel": str(rel_report_latest),
                     "bundle_sha256": sha256_file(root / rel_bundle_latest),
-                    "report_sha256": sha256_bytes((root / rel_report_latest).read_text(encoding="utf-8").encode("utf-8")),
+                    "report_sha256": sha256_file(root / rel_report_latest),
                 }
             else:
                 status["published"] = None
 
-            write_json(root / rel_bundle_bad, candidate_bundle)
-            write_text(root / rel_report_bad, candidate_report)
-            write_text(root / rel_bundle_bad_sha, f"{candidate_bundle_sha}  {rel_bundle_bad.name}\n")
-            write_text(root / rel_report_bad_sha, f"{candidate_report_sha}  {rel_report_bad.name}\n")
+            outputs = [
+                (rel_bundle_bad, candidate_bundle_bytes),
+                (rel_report_bad, candidate_report_bytes),
+                (rel_bundle_bad_sha, f"{candidate_bundle_sha}  {rel_bundle_bad.name}\n".encode("utf-8")),
+                (rel_report_bad_sha, f"{candidate_report_sha}  {rel_report_bad.name}\n".encode("utf-8")),
+            ]
 
         else:
             # OK/WARN -> publish as latest
@@ -1064,13 +1131,17 @@ def main() -> None:
             }
             status["published"] = dict(status["candidate"])
 
-            write_json(root / rel_bundle_latest, candidate_bundle)
-            write_text(root / rel_report_latest, candidate_report)
-            write_text(root / rel_bundle_latest_sha, f"{candidate_bundle_sha}  {rel_bundle_latest.name}\n")
-            write_text(root / rel_report_latest_sha, f"{candidate_report_sha}  {rel_report_latest.name}\n")
+            outputs = [
+                (rel_bundle_latest, candidate_bundle_bytes),
+                (rel_report_latest, candidate_report_bytes),
+                (rel_bundle_latest_sha, f"{candidate_bundle_sha}  {rel_bundle_latest.name}\n".encode("utf-8")),
+                (rel_report_latest_sha, f"{candidate_report_sha}  {rel_report_latest.name}\n".encode("utf-8")),
+            ]
 
         # Always write status (last)
-        write_json(root / rel_status, status)
+        outputs.append((rel_status, json_bytes(status)))
+        for rel, data in outputs:
+            write_bytes(root / rel, data)
 
 
 if __name__ == "__main__":
@@ -5,7 +5,10 @@ from __future__ import annotations
 
 import json
 import os
+import random
+import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -30,21 +33,45 @@ FAPI_BASES = [
 # DERIV_FAPI_BASES="https://fapi.binance.com,https://fapi1.binance.com"
 DERIV_FAPI_BASES_ENV = "DERIV_FAPI_BASES"
 
+# Endpoints fetched per symbol: key -> (path, extra params besides symbol).
+# The calls are independent and network-bound, so main() issues them all at once.
+DERIV_ENDPOINTS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "funding": ("/fapi/v1/premiumIndex", {}),
+    "open_interest": ("/fapi/v1/openInterest", {}),
+    "open_interest_hist": ("/futures/data/openInterestHist", {"period": "1d", "limit": 90}),
+    "long_short": ("/futures/data/globalLongShortAccountRatio", {"period": "4h", "limit": 30}),
+}
+FETCH_WORKERS = 6
+
+# Fetch only some endpoints (keys of DERIV_ENDPOINTS); skipped ones are left out of the output,
+# which lists the requested ones under "endpoints":
+# DERIV_ENDPOINTS="funding,open_interest"
+DERIV_ENDPOINTS_ENV = "DERIV_ENDPOINTS"
+
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="microseconds").replace("+00:00", "Z")
 
 
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
 def atomic_write_bytes(path: Path, data: bytes) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_bytes(data)
+    # raw fd (no buffered file object), same as iron_common.write_bytes
+    fd = os.open(tmp, _WRITE_FLAGS, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
     tmp.replace(path)
 
 
-def write_json_pretty(path: Path, obj: Any) -> None:
-    s = json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
-    atomic_write_bytes(path, s.encode("utf-8"))
+def json_pretty_bytes(obj: Any) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8")
 
 
 def http_get_json(url: str, params: Dict[str, Any], timeout: int = 12) -> Any:
@@ -55,45 +82,51 @@ def http_get_json(url: str, params: Dict[str, Any], timeout: int = 12) -> Any:
     return json.loads(raw.decode("utf-8"))
 
 
-def try_get(path: str, params: Dict[str, Any], retries: int = 2) -> Any:
+def try_get(path: str, params: Dict[str, Any], retries: int = 2, bases: Optional[List[str]] = None) -> Any:
     """
     Robust fetch with failover across Binance USD-M futures REST bases.
 
     Notes:
       - Binance futures endpoints live under /fapi/* and /futures/data/* on fapi.* hosts.
       - We keep a short per-base error trace in the exception message for easier debugging in CI.
+      - bases: parse_bases_env() result; main() parses it once and passes it to every call.
     """
-    # env override
-    raw_bases = os.environ.get(DERIV_FAPI_BASES_ENV, "").strip()
-    if raw_bases:
-        bases = [b.strip() for b in raw_bases.split(",") if b.strip()]
-    else:
-        bases = list(FAPI_BASES)
-
     errors: List[str] = []
+    bases = parse_bases_env() if bases is None else bases
 
-    for base in bases:
-        url = base.rstrip("/") + path
+    for i, base in enumerate(bases):
+        url = base + path
         for attempt in range(1, retries + 1):
             try:
                 return http_get_json(url, params)
             except HTTPError as e:
-                # rate limit / temporary bans can happen; backoff a bit.
                 code = getattr(e, "code", None)
-                errors.append(f"{base}{path}#{attempt}: HTTP {code}")
-                sleep_s = 0.6 * attempt
+                errors.append(f"{url}#{attempt}: HTTP {code}")
                 if code in (418, 429):
+                    # rate limit / temporary ban: the mirrors share our IP weight, so back off even before failing over
                     sleep_s = 2.0 * attempt
-                time.sleep(sleep_s)
+                else:
+                    sleep_s = 0.6 * attempt if attempt < retries else 0.0
             except (URLError, TimeoutError, ValueError) as e:
-                errors.append(f"{base}{path}#{attempt}: {type(e).__name__}")
-                time.sleep(0.6 * attempt)
+                errors.append(f"{url}#{attempt}: {type(e).__name__}")
+                # retrying the same base backs off; moving on to the next base does not
+                sleep_s = 0.6 * attempt if attempt < retries else 0.0
+            if sleep_s and (attempt < retries or i < len(bases) - 1):
+                # jitter: concurrent fetches (fetch_all) would otherwise retry in lockstep
+                time.sleep(sleep_s + random.uniform(0.0, 0.1))
 
     # keep last few errors only (don't bloat output)
     tail = " | ".join(errors[-6:]) if errors else "unknown"
     raise RuntimeError(f"fetch failed for {path}: {tail}")
 
 
+def parse_bases_env() -> List[str]:
+    """FAPI bases (env override or FAPI_BASES), normalized without trailing '/'."""
+    raw = os.environ.get(DERIV_FAPI_BASES_ENV, "").strip()
+    bases = [b.strip() for b in raw.split(",")] if raw else FAPI_BASES
+    return [b.rstrip("/") for b in bases if b]
+
+
 def parse_symbols_env() -> List[str]:
     raw = os.environ.get("DERIV_SYMBOLS", "").strip()
     if not raw:
@@ -106,6 +139,31 @@ def parse_symbols_env() -> List[str]:
     return out or DEFAULT_SYMBOLS
 
 
+def parse_endpoints_env() -> List[str]:
+    raw = os.environ.get(DERIV_ENDPOINTS_ENV, "").strip()
+    if not raw:
+        return list(DERIV_ENDPOINTS)
+    wanted = {x.strip().lower() for x in raw.split(",") if x.strip()}
+    picked = [k for k in DERIV_ENDPOINTS if k in wanted]
+    unknown = sorted(wanted - set(DERIV_ENDPOINTS))
+    if unknown:
+        fallback = "" if picked else "; none known, fetching all"
+        print(f"WARN: {DERIV_ENDPOINTS_ENV}: unknown endpoint(s) {', '.join(unknown)} "
+              f"(known: {', '.join(DERIV_ENDPOINTS)}){fallback}", file=sys.stderr)
+    return picked or list(DERIV_ENDPOINTS)
+
+
+def fetch_all(
+    pool: ThreadPoolExecutor, symbols: List[str], endpoints: List[str], bases: List[str]
+) -> Dict[Tuple[str, str], Future]:
+    """Submit every (symbol, endpoint) try_get; result() re-raises its fetch error."""
+    return {
+        (sym, key): pool.submit(try_get, DERIV_ENDPOINTS[key][0], {"symbol": sym, **DERIV_ENDPOINTS[key][1]}, bases=bases)
+        for sym in symbols
+        for key in endpoints
+    }
+
+
 def to_f(x: Any) -> Optional[float]:
     try:
         if x is None:
@@ -160,7 +218,9 @@ def compute_oi_band_from_hist(hist: Any) -> Tuple[Optional[Dict[str, Any]], Opti
     if metric is None:
         return None, None
 
-    vals: List[Tuple[int, float]] = []
+    # one pass into parallel lists: series feeds the stats, times only the tail
+    times: List[int] = []
+    series: List[float] = []
     for it in hist:
         if not isinstance(it, dict):
             continue
@@ -171,11 +231,11 @@ def compute_oi_band_from_hist(hist: Any) -> Tuple[Optional[Dict[str, Any]], Opti
             continue
         if v <= 0:
             continue
-        vals.append((t, float(v)))
-    if len(vals) < 10:
+        times.append(t)
+        series.append(float(v))
+    if len(series) < 10:
         return None, metric
 
-    series = [v for _, v in vals]
     sv = sorted(series)
     cur = series[-1]
 
@@ -204,8 +264,7 @@ def compute_oi_band_from_hist(hist: Any) -> Tuple[Optional[Dict[str, Any]], Opti
             band = "extreme"
 
     # маленький хвост для дебага (не раздуваем файл)
-    tail = vals[-10:]
-    tail_out = [{"t": t, "v": round(v, 6)} for t, v in tail]
+    tail_out = [{"t": t, "v": round(v, 6)} for t, v in zip(times[-10:], series[-10:])]
 
     out = {
         "period": "1d",
@@ -227,77 +286,84 @@ def compute_oi_band_from_hist(hist: Any) -> Tuple[Optional[Dict[str, Any]], Opti
 def main() -> None:
     updated_utc = utc_now_iso()
     symbols = parse_symbols_env()
+    endpoints = parse_endpoints_env()
+    bases = parse_bases_env()
 
     out: Dict[str, Any] = {
         "updated_utc": updated_utc,
         "source": "binance_usdtm_futures",
+        # endpoints requested this run (DERIV_ENDPOINTS); sections of the others are absent on purpose
+        "endpoints": endpoints,
         "symbols": {},
     }
 
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        fetched = fetch_all(pool, symbols, endpoints, bases)
+
     for sym in symbols:
         entry: Dict[str, Any] = {"errors": []}
 
         # Funding snapshot (premiumIndex)
-        try:
-            prem = try_get("/fapi/v1/premiumIndex", {"symbol": sym})
-            entry["funding"] = {
-                "lastFundingRate": prem.get("lastFundingRate"),
-                "nextFundingTime": prem.get("nextFundingTime"),
-                "markPrice": prem.get("markPrice"),
-                "indexPrice": prem.get("indexPrice"),
-                "time": prem.get("time"),
-            }
-        except Exception as e:
-            entry["funding"] = None
-            entry["errors"].append(f"funding: {e}")
+        if "funding" in endpoints:
+            try:
+                prem = fetched[(sym, "funding")].result()
+                entry["funding"] = {
+                    "lastFundingRate": prem.get("lastFundingRate"),
+                    "nextFundingTime": prem.get("nextFundingTime"),
+                    "markPrice": prem.get("markPrice"),
+                    "indexPrice": prem.get("indexPrice"),
+                    "time": prem.get("time"),
+                }
+            except Exception as e:
+                entry["funding"] = None
+                entry["errors"].append(f"funding: {e}")
 
         # Open interest snapshot
-        try:
-            oi = try_get("/fapi/v1/openInterest", {"symbol": sym})
-            entry["open_interest"] = {
-                "openInterest": oi.get("openInterest"),
-                "time": oi.get("time"),
-            }
-        except Exception as e:
-            entry["open_interest"] = None
-            entry["errors"].append(f"open_interest: {e}")
+        if "open_interest" in endpoints:
+            try:
+                oi = fetched[(sym, "open_interest")].result()
+                entry["open_interest"] = {
+                    "openInterest": oi.get("openInterest"),
+                    "time": oi.get("time"),
+                }
+            except Exception as e:
+                entry["open_interest"] = None
+                entry["errors"].append(f"open_interest: {e}")
 
         # Open interest banding (history -> percentile bands)
-        try:
-            hist = try_get(
-                "/futures/data/openInterestHist",
-                {"symbol": sym, "period": "1d", "limit": 90},
-            )
-            band_obj, _metric = compute_oi_band_from_hist(hist)
-            entry["open_interest_band"] = band_obj
-            if band_obj is None:
-                entry["errors"].append("open_interest_band: insufficient_hist")
-        except Exception as e:
-            entry["open_interest_band"] = None
-            entry["errors"].append(f"open_interest_band: {e}")
+        if "open_interest_hist" in endpoints:
+            try:
+                hist = fetched[(sym, "open_interest_hist")].result()
+                band_obj, _metric = compute_oi_band_from_hist(hist)
+                entry["open_interest_band"] = band_obj
+                if band_obj is None:
+                    entry["errors"].append("open_interest_band: insufficient_hist")
+            except Exception as e:
+                entry["open_interest_band"] = None
+                entry["errors"].append(f"open_interest_band: {e}")
 
         # Global long/short account ratio (last point)
-        try:
-            gls = try_get(
-                "/futures/data/globalLongShortAccountRatio",
-                {"symbol": sym, "period": "4h", "limit": 30},
-            )
-            if isinstance(gls, list) and gls:
-                entry["global_long_short_account_ratio"] = gls[-1]
-            else:
-                entry["global_long_short_account_ratio"] = gls
-            entry["global_long_short_account_ratio_note"] = "period=4h, last point"
-        except Exception as e:
-            entry["global_long_short_account_ratio"] = None
-            entry["errors"].append(f"long_short: {e}")
+        if "long_short" in endpoints:
+            try:
+                gls = fetched[(sym, "long_short")].result()
+                if isinstance(gls, list) and gls:
+                    entry["global_long_short_account_ratio"] = gls[-1]
+                else:
+                    entry["global_long_short_account_ratio"] = gls
+                entry["global_long_short_account_ratio_note"] = "period=4h, last point"
+            except Exception as e:
+                entry["global_long_short_account_ratio"] = None
+                entry["errors"].append(f"long_short: {e}")
 
         out["symbols"][sym] = entry
 
+    # core5/core10 carry the same payload: encode once, write it to every file
+    payload = json_pretty_bytes(out)
     for root in OUT_ROOTS:
         d = root / "deriv" / "binance"
         d.mkdir(parents=True, exist_ok=True)
-        write_json_pretty(d / "core5_latest.json", out)
-        write_json_pretty(d / "core10_latest.json", out)
+        atomic_write_bytes(d / "core5_latest.json", payload)
+        atomic_write_bytes(d / "core10_latest.json", payload)
 
 
 if __name__ == "__main__":
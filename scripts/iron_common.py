@@ -11,30 +11,97 @@ Goals:
 from __future__ import annotations
 import hashlib
 import json
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 
 def sha256_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
+# Digests of files already hashed this run, keyed by (path, mtime_ns, size):
+# contract/state/published artifacts are hashed by several phases, read once.
+_FILE_SHA256: Dict[Tuple[str, int, int], str] = {}
+
+def _file_key(path: Path) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return (os.fspath(path), st.st_mtime_ns, st.st_size)
+
 def sha256_file(path: Path) -> str:
-    return sha256_bytes(path.read_bytes())
+    key = _file_key(path)
+    digest = _FILE_SHA256.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = _FILE_SHA256[key] = _file_digest(f)
+    return digest
+
+def _file_digest(f: Any) -> str:
+    """Stream an open binary file through sha256 without holding it in memory."""
+    if hasattr(hashlib, "file_digest"):  # 3.11+: the read loop runs in C
+        return hashlib.file_digest(f, "sha256").hexdigest()
+    h = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1 << 20), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+_CANONICAL_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+def sha256_json(obj: Any) -> str:
+    """sha256 of canonical JSON (compact separators, sorted keys, UTF-8).
+
+    Same bytes as json.dumps(obj, ensure_ascii=False, separators=(",", ":"),
+    sort_keys=True).encode("utf-8"). encode() (not iterencode()) so the C
+    encoder does the work; iterencode() falls back to the pure-Python one.
+    """
+    return sha256_bytes(_CANONICAL_JSON.encode(obj).encode("utf-8"))
+
+_BUNDLE_SELF_HASH_KEYS = ("bundle_sha256", "report_sha256")
+
+def bundle_sha256(bundle: Dict[str, Any]) -> str:
+    """Canonical bundle hash: sha256_json of the bundle without its own sha fields.
+    Filters the top level in one pass instead of dict(bundle) + pop + pop."""
+    return sha256_json({k: v for k, v in bundle.items() if k not in _BUNDLE_SELF_HASH_KEYS})
 
 def read_json(path: Path) -> Any:
     return json.loads(path.read_text(encoding="utf-8"))
 
-def write_json(path: Path, obj: Any) -> None:
-    """Write JSON in a human-readable, deterministic form.
+def read_json_sha256(path: Path) -> Tuple[Any, str]:
+    """Read a JSON file once; return (parsed doc, sha256 of the raw bytes).
+    The digest also serves later sha256_file(path) calls on the unchanged file.
+    """
+    key = _file_key(path)
+    raw = path.read_bytes()
+    digest = _FILE_SHA256[key] = sha256_bytes(raw)
+    return json.loads(raw.decode("utf-8")), digest
+
+def json_bytes(obj: Any) -> bytes:
+    """Serialize JSON in a human-readable, deterministic form.
 
     - indent=2 so ChatGPT/web can read multi-line
     - sort_keys=True for stability
     - newline at end for POSIX friendliness
     """
+    return (json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8")
+
+def write_json(path: Path, obj: Any) -> None:
+    """Write JSON in the json_bytes() form."""
+    write_bytes(path, json_bytes(obj))
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+def write_bytes(path: Path, data: bytes) -> None:
+    """
+    open/write/close on the raw fd (no buffered file object): the small
+    artifacts (.sha256 sidecars, status) go out in a single write() syscall.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(
-        json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
-        encoding="utf-8",
-    )
+    fd = os.open(path, _WRITE_FLAGS, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
 def write_text(path: Path, text: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -45,30 +112,73 @@ def json_pointer_get(doc: Any, pointer: str) -> Any:
     RFC 6901: pointer like "/a/b/0".
     Supports "~1" => "/", "~0" => "~".
     """
+    return compile_json_pointer(pointer)(doc)
+
+@lru_cache(maxsize=1024)
+def compile_json_pointer(pointer: str) -> Callable[[Any], Any]:
+    """
+    Tokenize/unescape a pointer once; return doc -> value.
+    Contract pointers are fixed per run, so every later lookup skips the
+    string work. Errors are those of json_pointer_get.
+    """
     if pointer == "" or pointer == "/":
-        return doc
+        return lambda doc: doc
     if not pointer.startswith("/"):
         raise ValueError(f"JSON pointer must start with '/': {pointer}")
-    parts = pointer.lstrip("/").split("/")
-    cur = doc
-    for raw in parts:
-        part = raw.replace("~1", "/").replace("~0", "~")
-        if isinstance(cur, list):
-            try:
-                idx = int(part)
-            except ValueError as e:
-                raise KeyError(f"Expected list index at '{part}' in pointer {pointer}") from e
-            try:
-                cur = cur[idx]
-            except IndexError as e:
-                raise KeyError(f"Index out of range at '{part}' in pointer {pointer}") from e
-        elif isinstance(cur, dict):
-            if part not in cur:
-                raise KeyError(f"Key '{part}' not found in pointer {pointer}")
-            cur = cur[part]
+    parts = tuple(_pointer_unescape(raw) for raw in pointer.lstrip("/").split("/"))
+
+    def get(doc: Any) -> Any:
+        cur = doc
+        for part in parts:
+            cur = _pointer_step(cur, part, pointer)
+        return cur
+
+    return get
+
+def _pointer_unescape(raw: str) -> str:
+    return raw.replace("~1", "/").replace("~0", "~")
+
+def _pointer_step(cur: Any, part: str, pointer: str) -> Any:
+    if isinstance(cur, list):
+        try:
+            idx = int(part)
+        except ValueError as e:
+            raise KeyError(f"Expected list index at '{part}' in pointer {pointer}") from e
+        try:
+            return cur[idx]
+        except IndexError as e:
+            raise KeyError(f"Index out of range at '{part}' in pointer {pointer}") from e
+    elif isinstance(cur, dict):
+        if part not in cur:
+            raise KeyError(f"Key '{part}' not found in pointer {pointer}")
+        return cur[part]
+    else:
+        raise KeyError(f"Cannot traverse into non-container at '{part}' in pointer {pointer}")
+
+def json_pointer_getter(doc: Any) -> Callable[[str], Any]:
+    """
+    json_pointer_get bound to one (unchanging) doc.
+    Resolved parent nodes are memoized, so pointers sharing a prefix
+    (/symbols/BTCUSDT/data/...) walk that prefix once.
+    Errors are the same as json_pointer_get(doc, pointer).
+    """
+    parents: Dict[str, Any] = {"": doc}
+
+    def get(pointer: str) -> Any:
+        if pointer == "/" or not pointer.startswith("/") or pointer.startswith("//"):
+            return json_pointer_get(doc, pointer)
+        head, _, last = pointer.rpartition("/")
+        if head in parents:
+            parent = parents[head]
         else:
-            raise KeyError(f"Cannot traverse into non-container at '{part}' in pointer {pointer}")
-    return cur
+            try:
+                parent = json_pointer_get(doc, head)
+            except KeyError:
+                return json_pointer_get(doc, pointer)  # raise with the full pointer
+            parents[head] = parent
+        return _pointer_step(parent, _pointer_unescape(last), pointer)
+
+    return get
 
 def coerce_number(x: Any) -> float:
     if isinstance(x, (int, float)):
@@ -81,3 +191,20 @@ def safe_float_eq(a: Any, b: Any, eps: float = 1e-12) -> bool:
     if isinstance(a, (int, float)) and isinstance(b, (int, float)):
         return abs(float(a) - float(b)) <= eps
     return a == b
+
+def facts_index_matches(facts: List[Dict[str, Any]], fx: Dict[str, Any]) -> bool:
+    """
+    Same result as {f.get("id"): f.get("value") for f in facts} == fx.
+    A facts_index built from this very list has the same key order, so it is
+    checked pairwise in one pass; anything else falls back to the dict compare.
+    """
+    if len(facts) == len(fx):
+        for (fid, val), f in zip(fx.items(), facts):
+            if f.get("id") != fid:
+                break
+            fv = f.get("value")
+            if fv is not val and fv != val:
+                break
+        else:
+            return True
+    return {f.get("id"): f.get("value") for f in facts} == fx
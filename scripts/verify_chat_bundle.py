@@ -25,7 +25,7 @@ from __future__ import annotations
 import json
 import hashlib
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
 
 DOCS_ROOT = Path("docs")
@@ -42,6 +42,14 @@ def _sha256_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
 
+_CANONICAL_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def _sha256_json(obj: Any) -> str:
+    # one-shot encode() runs the C encoder; a streaming dump()/iterencode() would not
+    return _sha256_bytes(_CANONICAL_JSON.encode(obj).encode("utf-8"))
+
+
 def _sha256_file(p: Path) -> str:
     h = hashlib.sha256()
     with p.open("rb") as f:
@@ -152,11 +160,7 @@ def main() -> None:
         try:
             bundle_sha_expected = bundle.get("bundle_sha256")
             if isinstance(bundle_sha_expected, str) and bundle_sha_expected:
-                tmp = dict(bundle)
-                tmp.pop("bundle_sha256", None)
-                tmp.pop("report_sha256", None)
-                tmp_bytes = json.dumps(tmp, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
-                bundle_sha = _sha256_bytes(tmp_bytes)
+                bundle_sha = _sha256_json({k: v for k, v in bundle.items() if k not in ("bundle_sha256", "report_sha256")})
                 if bundle_sha != bundle_sha_expected:
                     verify_errors.append(f"verify: bundle_sha256 mismatch: computed={bundle_sha} expected={bundle_sha_expected}")
         except Exception as e:
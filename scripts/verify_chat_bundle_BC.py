@@ -19,7 +19,8 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from iron_common import (
-    read_json, write_json, sha256_file, sha256_bytes, json_pointer_get, safe_float_eq
+    read_json, write_json, sha256_file, sha256_bytes, bundle_sha256, json_pointer_getter, safe_float_eq,
+    facts_index_matches,
 )
 
 CONTRACT_PATH = Path("iron/IRON_CONTRACT_CURRENT.json") if Path("iron/IRON_CONTRACT_CURRENT.json").exists() else Path("iron/IRON_CONTRACT_v1.json")
@@ -133,11 +134,7 @@ def main() -> None:
                 verify_errors.append(f"verify: contract.sha256 mismatch: computed={contract_sha} bundle={bundle['sources']['contract'].get('sha256')}")
 
         # Verify bundle sha (excluding self-hashes)
-        tmp = dict(bundle)
-        tmp.pop("bundle_sha256", None)
-        tmp.pop("report_sha256", None)
-        bundle_bytes = json.dumps(tmp, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
-        bundle_sha = sha256_bytes(bundle_bytes)
+        bundle_sha = bundle_sha256(bundle)
         if bundle_sha != bundle.get("bundle_sha256"):
             verify_errors.append(f"verify: bundle.sha256 mismatch: computed={bundle_sha} bundle={bundle.get('bundle_sha256')}")
 
@@ -154,10 +151,12 @@ def main() -> None:
             state_doc = {}
 
         deriv_doc: Dict[str, Any] = {}
+        # shared pointer prefixes (/symbols/BTCUSDT/...) are walked once per doc
+        get_state = json_pointer_getter(state_doc)
+        get_deriv = json_pointer_getter(deriv_doc)
 
         fx: Dict[str, Any] = bundle.get("facts_index", {}) or {}
-        fx2 = {f.get("id"): f.get("value") for f in bundle.get("facts", [])}
-        if fx2 != fx:
+        if not facts_index_matches(bundle.get("facts", []), fx):
             verify_errors.append("verify: facts_index mismatch: facts_index must exactly match the facts[] list")
 
         for f in bundle.get("facts", []) or []:
@@ -166,8 +165,7 @@ def main() -> None:
                 src = f["source"]
                 ptr = f["pointer"]
                 expected = f.get("value")
-                doc = state_doc if src == "state" else deriv_doc
-                actual = json_pointer_get(doc, ptr)
+                actual = (get_state if src == "state" else get_deriv)(ptr)
                 if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
                     if not safe_float_eq(float(expected), float(actual)):
                         verify_errors.append(f"verify: fact mismatch {fid}: expected={expected} actual={actual} pointer={ptr} src={src}")